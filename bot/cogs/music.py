@@ -12,6 +12,7 @@ from bot.utils.decarators.voice_check import require_voice_channel
 
 if TYPE_CHECKING:
     from bot.juno import Juno
+    from bot.services.music.music_player import MusicPlayer
 
 
 class MusicCog(commands.Cog):
@@ -54,32 +55,44 @@ class MusicCog(commands.Cog):
     async def play(self, interaction: discord.Interaction, query: str, filter: str | None):
         await interaction.response.defer(ephemeral=True)
 
-        # Get the music player for this guild
-        player = self.bot.music_queue_service.get_player(interaction.guild)
-
-        # Check / Join a voice channel
-        if not player.voice_client:
-            join_action_response = await player.join(interaction)
-
-            if not join_action_response.is_success:
-                await interaction.followup.send(join_action_response.message)
-                return
+        # Get the music player for this guild and check / join a voice channel
+        if not await self._get_joined_player(interaction):
+            return
 
         # Generate the song metadata
-        metadata = self.bot.audio_service.get_metadata(self.bot.audio_service.extract_info(query))
+        try:
+            metadata = await self.bot.audio_service.resolve(query)
+        except TimeoutError:
+            await interaction.followup.send("Looking up that song took too long, please try again.", ephemeral=True)
+            return
+
+        # The player can be reaped or disconnected while the song resolves, so fetch it again
+        if not (player := await self._get_joined_player(interaction)):
+            return
         metadata.text_channel = interaction.channel
         metadata.requested_by = interaction.user.name
         metadata.filter_preset = FilterPreset.from_value(filter)
 
-        if not player.is_playing() and player.queue.empty():
+        if not player.is_playing() and len(player.queue) == 0:
             await interaction.followup.send("Starting playback...", ephemeral=True)
         else:
-            queue_position = player.queue.qsize()
+            queue_position = len(player.queue)
             embed = self.bot.embed_service.create_added_to_queue_embed(metadata, queue_position)
             await interaction.followup.send(embed=embed, ephemeral=True)
 
         await player.add(metadata)
 
+    async def _get_joined_player(self, interaction: discord.Interaction) -> "MusicPlayer | None":
+        """The guild's music player, joining the user's voice channel first if it is not connected."""
+        player = self.bot.music_queue_service.get_player(interaction.guild)
+        if not player.voice_client:
+            join_action_response = await player.join(interaction)
+
+            if not join_action_response.is_success:
+                await interaction.followup.send(join_action_response.message)
+                return None
+        return player
+
     @app_commands.command(name="skip", description="Skip actively playing audio.")
     @log_command_usage()
     @require_voice_channel(ephemeral=True, allow_admin_bypass=True)
@@ -114,8 +127,8 @@ class MusicCog(commands.Cog):
     async def queue(self, interaction: discord.Interaction):
         player = self.bot.music_queue_service.get_player(interaction.guild)
 
-        # Get a copy of the queue items
-        queue_items = list(player.queue._queue)
+        # Pages are read from the live queue, it is only copied if it changes while the view is open
+        queue_items = player.queue.snapshot()
 
         embed = self.bot.embed_service.create_queue_embed(
             queue_items=queue_items,
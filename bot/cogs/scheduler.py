@@ -87,7 +87,8 @@ class SchedulerCog(commands.Cog):
                     response = await self.bot.ai_service.chat(messages=messages)
 
                     embed, emoji_file = self.bot.embed_service.create_morning_embed(message=response.content)
-                    await channel.send(
+                    await self.bot.outbound_dispatch_service.send(
+                        channel,
                         embed=embed,
                         file=discord.File(os.path.join(os.getcwd(), "emojis", emoji_file), emoji_file),
                     )
@@ -224,7 +225,8 @@ class SchedulerCog(commands.Cog):
 
             embed, emoji_file = self.bot.embed_service.create_morning_embed(message=response.content)
 
-            await interaction.channel.send(
+            await self.bot.outbound_dispatch_service.send(
+                interaction.channel,
                 embed=embed,
                 file=discord.File(os.path.join(os.getcwd(), "emojis", emoji_file), emoji_file),
             )
@@ -1,7 +1,7 @@
 import discord
 from discord import app_commands
 
-from bot.services import AIChatResponse, Message
+from bot.services import AIChatResponse, MentionPriority, Message
 from bot.utils.decarators.command_logging import log_command_usage
 
 
@@ -12,6 +12,14 @@ class ChatCommand(app_commands.Command):
         async def chat(interaction: discord.Interaction, message: str):
             await interaction.response.defer(ephemeral=False)
 
-            response: AIChatResponse = await interaction.client.ai_service.chat(messages=[Message(role="user", content=message)])
+            bot = interaction.client
+            guild_id = interaction.guild.id if interaction.guild else None
+            scheduled = bot.mention_scheduler_service.schedule(guild_id, MentionPriority.HIGH, lambda: bot.ai_service.chat(messages=[Message(role="user", content=message)]))
+
+            if scheduled is None:
+                await interaction.followup.send(bot.config.mentionScheduler.overloadMessage)
+                return
+
+            response: AIChatResponse = await scheduled
 
             await interaction.followup.send(response.content)
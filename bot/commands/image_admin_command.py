@@ -50,11 +50,11 @@ class ImageAdminCommand:
 
             try:
                 bot = interaction.client
-                count = bot.image_limit_service.reset_all_users(guild_id=interaction.guild.id)
+                bot.image_limit_service.reset_all_users(guild_id=interaction.guild.id)
 
                 embed = discord.Embed(
                     title="✅ All Limits Reset",
-                    description=f"Image generation limits have been reset for {count} user(s)",
+                    description="Image generation limits have been reset for everyone in this server",
                     color=discord.Color.green(),
                 )
 
@@ -119,14 +119,14 @@ class ImageAdminCommand:
                     return
 
                 bot = interaction.client
-                count = bot.image_limit_service.set_guild_limit(interaction.guild.id, limit)
+                bot.image_limit_service.set_guild_limit(interaction.guild.id, limit)
 
                 embed = discord.Embed(
                     title="✅ Guild Limit Updated",
-                    description=f"Daily image limit set to **{limit}** for {count} user(s) in this server",
+                    description=f"Daily image limit set to **{limit}** for everyone in this server",
                     color=discord.Color.green(),
                 )
-                embed.add_field(name="Note", value="New users will receive the default limit from config unless changed individually.", inline=False)
+                embed.add_field(name="Note", value="Users with an individual limit set through `/image_admin set_user_limit` keep it.", inline=False)
 
                 await interaction.followup.send(embed=embed, ephemeral=True)
 
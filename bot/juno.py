@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -6,7 +7,32 @@ import time
 import discord
 from discord.ext import commands
 
-from bot.services import AiOrchestrator, AiServiceFactory, AudioService, Config, CooldownService, DiscordMessagesService, EmbedService, ImageGenerationService, MessageService, MongoImageLimitService, MusicQueueService, ResponseService
+from bot.services import (
+    AiOrchestrator,
+    AiServiceFactory,
+    AttachmentDownloadService,
+    AudioService,
+    BatchedChatResponse,
+    Config,
+    ConversationSummaryService,
+    DiscordMessagesService,
+    EmbedService,
+    ImageGenerationService,
+    ImageJobService,
+    MentionCoalescingService,
+    MentionPriority,
+    MentionRewriter,
+    MentionSchedulerService,
+    MessageIngestionService,
+    MessageService,
+    MongoImageLimitService,
+    MusicQueueService,
+    MusicStateService,
+    OutboundDispatchService,
+    PendingMention,
+    RateLimitService,
+    ResponseService,
+)
 from bot.utils import JunoSlash
 
 
@@ -18,6 +44,7 @@ class Juno(commands.Bot):
         self.juno_slash = JunoSlash(self.tree)
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.metrics_task: asyncio.Task | None = None
 
         # Load prompts
         self.prompts = self._load_prompts(config.promptsPath)
@@ -25,15 +52,24 @@ class Juno(commands.Bot):
         # Services
         self.ai_service = AiServiceFactory.get_service(provider=config.aiConfig.preferredAiProvider, config=config)
         self.embed_service = EmbedService()
-        self.audio_service = AudioService()
+        self.audio_service = AudioService(self)
         self.music_queue_service = MusicQueueService(self)
+        self.music_state_service = MusicStateService(self)
         self.ai_orchestrator = AiOrchestrator(config=config)
+        self.attachment_download_service = AttachmentDownloadService(self)
         self.image_generation_service = ImageGenerationService(self)
+        self.mention_rewriter = MentionRewriter(config.usersToId, config.idToUsers)
         self.message_service = MessageService(self, self.prompts, config.idToUsers)
-        self.response_service = ResponseService(config.usersToId)
-        self.cooldown_service = CooldownService(config.mentionCooldown, config.cooldownBypassList)
+        self.outbound_dispatch_service = OutboundDispatchService(config.outboundDispatch.messagesPerWindow, config.outboundDispatch.windowSeconds, config.outboundDispatch.mergeAdjacent, config.outboundDispatch.maxRetries)
+        self.response_service = ResponseService(self.mention_rewriter, self.outbound_dispatch_service, config.maxResponseChunks)
+        self.rate_limit_service = RateLimitService(config.mentionCooldown, config.cooldownBypassList, config.rateLimits.policies, config.rateLimits.maxEntriesPerPolicy)
         self.image_limit_service = MongoImageLimitService(self, config.aiConfig.maxDailyImages)
         self.discord_messages_service = DiscordMessagesService(self)
+        self.message_ingestion_service = MessageIngestionService(self)
+        self.conversation_summary_service = ConversationSummaryService(self)
+        self.mention_scheduler_service = MentionSchedulerService(config.mentionScheduler.workers, config.mentionScheduler.maxQueuePerGuild, config.mentionScheduler.maxQueueTotal)
+        self.image_job_service = ImageJobService(self)
+        self.mention_coalescing_service = MentionCoalescingService(config.mentionCoalescing.windowMs, config.mentionCoalescing.maxBatchSize, self._schedule_chat_batch)
 
     def _load_prompts(self, prompts_path: str) -> dict:
         """Load prompts from JSON file."""
@@ -47,9 +83,55 @@ class Juno(commands.Bot):
             return {}
 
     async def setup_hook(self):
+        self.message_ingestion_service.start()
+        self.mention_scheduler_service.start()
+        self.image_job_service.start()
+        self.music_queue_service.start()
+        self.music_state_service.start()
+        if self.config.metricsLogIntervalSeconds > 0:
+            self.metrics_task = asyncio.create_task(self._log_metrics())
         await self.juno_slash.load_commands()
         await self.load_cogs()
 
+    async def close(self):
+        if self.metrics_task:
+            self.metrics_task.cancel()
+            await asyncio.gather(self.metrics_task, return_exceptions=True)
+        await self.music_state_service.stop()
+        await self.music_queue_service.stop()
+        await self.mention_scheduler_service.stop()
+        await self.image_job_service.stop()
+        await self.message_ingestion_service.stop()
+        await self.attachment_download_service.close()
+        await self.outbound_dispatch_service.stop()
+        self.image_generation_service.close()
+        await self.audio_service.close()
+        await super().close()
+
+    def get_metrics(self) -> dict[str, dict]:
+        """Queue depths, cache sizes and counters of every service that keeps them."""
+        return {
+            "rate_limits": self.rate_limit_service.get_metrics(),
+            "outbound_dispatch": self.outbound_dispatch_service.get_metrics(),
+            "mention_scheduler": self.mention_scheduler_service.get_metrics(),
+            "image_jobs": self.image_job_service.get_metrics(),
+            "image_workers": self.image_generation_service.worker_pool.get_metrics(),
+            "image_descriptions": self.image_generation_service.description_cache.get_metrics(),
+            "audio_metadata": self.audio_service.metadata_cache.get_metrics(),
+            "audio_files": self.audio_service.file_cache.get_metrics(),
+            "music_players": self.music_queue_service.get_metrics(),
+            "music_state": self.music_state_service.get_metrics(),
+        }
+
+    async def _log_metrics(self):
+        while True:
+            await asyncio.sleep(self.config.metricsLogIntervalSeconds)
+            try:
+                for name, metrics in self.get_metrics().items():
+                    self.logger.info(f"[METRICS] - {name}: {metrics}")
+            except Exception as e:
+                self.logger.error(f"Error collecting metrics: {e}", exc_info=True)
+
     async def load_cogs(self):
         cogs_dir = os.path.join(os.getcwd(), "bot", "cogs")
         self.logger.info(f"📁 Looking for cogs in: {cogs_dir}")
@@ -89,6 +171,10 @@ class Juno(commands.Bot):
         self.logger.info("✅ Juno is online!")
 
     async def on_message(self, message: discord.Message):
+        # Store every message (including our own) for conversation history
+        await self.message_ingestion_service.enqueue_message(message)
+        await self.conversation_summary_service.note_message(message)
+
         # Early returns for invalid messages
         if message.author == self.user:
             return
@@ -101,20 +187,41 @@ class Juno(commands.Bot):
         if not self.message_service.should_respond_to_message(message, reference_message):
             return
 
-        # Apply cooldown check
-        if not self.cooldown_service.check_cooldown(message.author.id, message.author.name):
+        # Apply rate limits, consuming from every policy only when all of them allow the mention
+        if not self.rate_limit_service.try_acquire(message):
             return
 
-        # Update cooldown and log interaction
-        self.cooldown_service.update_cooldown(message.author.id)
         user = message.author
         guild = message.guild
         self.logger.info(f"📝 {user.name} mentioned Juno in {message.channel.name}: {message.content}")
 
-        # Process and respond
+        # Queue the pipeline behind the fair scheduler, bypass users jump the line
+        priority = MentionPriority.HIGH if user.id in self.rate_limit_service.bypass_ids else MentionPriority.NORMAL
+        scheduled = self.mention_scheduler_service.schedule(guild.id if guild else None, priority, lambda: self._process_mention(message, reference_message, user, guild))
+
+        if scheduled is None:
+            await self.response_service.send_response(message, self.config.mentionScheduler.overloadMessage)
+            return
+
+        await scheduled
+
+    async def _process_mention(self, message: discord.Message, reference_message: discord.Message, user: discord.User, guild: discord.Guild):
+        """Process and respond to a mention once the scheduler hands it a worker."""
         async with message.channel.typing():
             await self._handle_message_intent(message, reference_message, user, guild)
 
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        await self.music_queue_service.on_voice_state_update(member, before, after)
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        await self.message_ingestion_service.enqueue_edit(payload)
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        await self.message_ingestion_service.enqueue_delete(payload.guild_id, payload.channel_id, [payload.message_id])
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        await self.message_ingestion_service.enqueue_delete(payload.guild_id, payload.channel_id, payload.message_ids)
+
     async def _handle_message_intent(self, message: discord.Message, reference_message: discord.Message, user: discord.User, guild: discord.Guild):
         """Handle the user's message based on detected intent."""
         # Determine if replying to bot's image for intent detection
@@ -133,35 +240,64 @@ class Juno(commands.Bot):
     async def _handle_chat_intent(self, message, reference_message, user, user_intent):
         """Handle chat intent."""
         self.logger.info(f"Chatting with intent: {user_intent.intent} for reason of: {user_intent.reasoning}")
+        if self.config.mentionCoalescing.enabled:
+            # Hand off and free this worker, the batch comes back through the scheduler as its own job
+            self.mention_coalescing_service.submit(message, reference_message, user)
+            return
+
         messages = await self.message_service.build_message_context(message, reference_message, user)
         response = await self.ai_service.chat(messages=messages)
         await self.response_service.send_response(message, response.content)
 
+    async def _schedule_chat_batch(self, mentions: list[PendingMention]):
+        """Run a coalesced batch as one job on the mention scheduler, so its generation counts against the worker pool."""
+        guild = mentions[0].message.guild
+        priority = MentionPriority.HIGH if any(mention.user.id in self.rate_limit_service.bypass_ids for mention in mentions) else MentionPriority.NORMAL
+        scheduled = self.mention_scheduler_service.schedule(guild.id if guild else None, priority, lambda: self._handle_chat_batch(mentions))
+
+        if scheduled is None:
+            for mention in mentions:
+                await self.response_service.send_response(mention.message, self.config.mentionScheduler.overloadMessage)
+            return
+
+        await scheduled
+
+    async def _handle_chat_batch(self, mentions: list[PendingMention]):
+        """Answer a batch of coalesced mentions with a single generation, falling back per mention for any that go unanswered."""
+        async with mentions[0].message.channel.typing():
+            await self._answer_chat_batch(mentions)
+
+    async def _answer_chat_batch(self, mentions: list[PendingMention]):
+        answered = set()
+
+        if len(mentions) > 1:
+            messages = await self.message_service.build_batched_message_context(mentions)
+            try:
+                batched_response = await self.ai_service.chat_with_schema(messages=messages, schema=BatchedChatResponse)
+                for reply in batched_response.replies:
+                    if 0 <= reply.mention_index < len(mentions) and reply.mention_index not in answered and reply.content.strip():
+                        answered.add(reply.mention_index)
+                        await self.response_service.send_response(mentions[reply.mention_index].message, reply.content)
+            except Exception as e:
+                self.logger.error(f"Batched chat generation failed, answering {len(mentions)} mention(s) individually: {e}")
+
+        for idx, mention in enumerate(mentions):
+            if idx in answered:
+                continue
+            messages = await self.message_service.build_message_context(mention.message, mention.reference_message, mention.user)
+            response = await self.ai_service.chat(messages=messages)
+            await self.response_service.send_response(mention.message, response.content)
+
     async def _handle_image_generation_intent(self, message, reference_message, user: discord.User, guild: discord.Guild):
         """Handle image generation intent."""
-        can_generate, limit_message = self.image_limit_service.can_generate_image(user, guild)
+        # Reserve quota up front so parallel requests cannot overshoot the daily limit
+        reservation, limit_message = await asyncio.to_thread(self.image_limit_service.reserve, user.id, guild.id)
 
-        self.logger.info(f"[HANDLEIMAGEGENERATIONINTENT] - {can_generate} - {limit_message}")
+        self.logger.info(f"[HANDLEIMAGEGENERATIONINTENT] - {reservation is not None} - {limit_message}")
 
-        if not can_generate:
+        if reservation is None:
             await self.response_service.send_response(message, limit_message)
             return
 
         image_attachments = self.message_service.get_image_attachments(message, reference_message)
-
-        if image_attachments:
-            self.logger.info(f"Editing/combining {len(image_attachments)} image(s)")
-            image_urls = [att.url for att in image_attachments]
-            image_generation_response = await self.image_generation_service.edit_images_from_urls(prompt=message.content, image_urls=image_urls)
-        else:
-            self.logger.info("No image attachments found, generating image with user prompt.")
-            image_generation_response = await self.image_generation_service.generate_image(prompt=message.content)
-
-        if image_generation_response.generated_image:
-            self.image_limit_service.increment_usage(message.author.id, message.guild.id)
-            image_bytes = self.image_generation_service.image_to_bytes(image=image_generation_response.generated_image)
-            filename = "edited_image.png" if image_attachments else "generated_image.png"
-            image_file = discord.File(image_bytes, filename=filename)
-            await self.response_service.send_response(message, image_generation_response.text_response, image_file)
-        else:
-            await self.response_service.send_response(message, image_generation_response.text_response)
+        await self.image_job_service.submit(message, [att.url for att in image_attachments], reservation)
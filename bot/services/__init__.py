@@ -6,17 +6,27 @@ from .ai.real_time_audio_service import (
     RealTimeAudioService,
     VoiceReceiveSink,
 )
-from .ai.types import AIChatResponse, ImageGenerationResponse, Message, UserIntent
+from .ai.types import AIChatResponse, BatchedChatResponse, ImageGenerationResponse, Message, UserIntent
+from .attachment_download_service import AttachmentDownloadService
 from .config_service import Config, get_config_service
-from .cooldown_service import CooldownService
+from .conversation_summary_service import ConversationSummaryService
 from .discord_messages_service import DiscordMessagesService
 from .embed_service import EmbedService, QueuePaginationView
+from .fair_queue import FairQueue
+from .image_job_service import ImageJob, ImageJobService
+from .mention_coalescing_service import MentionCoalescingService, PendingMention
+from .mention_rewriter import MentionRewriter
+from .mention_scheduler_service import MentionPriority, MentionSchedulerService
+from .message_ingestion_service import MessageIngestionService
 from .message_service import MessageService
 from .mongo_image_limit_service import MongoImageLimitService
 from .mongo_morning_config_service import MongoMorningConfigService
 from .music.audio_service import AudioService
 from .music.music_queue_service import MusicPlayer, MusicQueueService
+from .music.music_state_service import MusicStateService
 from .music.types import AudioMetaData, AudioSource, FilterPreset
+from .outbound_dispatch_service import OutboundDispatchService
+from .rate_limit_service import RateLimitService
 from .response_service import ResponseService
 
 __all__ = [
@@ -25,6 +35,7 @@ __all__ = [
     "Message",
     "MusicPlayer",
     "MusicQueueService",
+    "MusicStateService",
     "AudioService",
     "AudioMetaData",
     "EmbedService",
@@ -33,17 +44,30 @@ __all__ = [
     "QueuePaginationView",
     "AiOrchestrator",
     "UserIntent",
+    "BatchedChatResponse",
     "ImageGenerationService",
     "ImageGenerationResponse",
+    "ImageJob",
+    "ImageJobService",
     "get_config_service",
     "Config",
     "MessageService",
+    "MessageIngestionService",
     "ResponseService",
-    "CooldownService",
+    "OutboundDispatchService",
+    "RateLimitService",
     "MongoImageLimitService",
     "MongoMorningConfigService",
     "RealTimeAudioService",
     "VoiceReceiveSink",
     "AudioProcessor",
     "DiscordMessagesService",
+    "AttachmentDownloadService",
+    "MentionCoalescingService",
+    "PendingMention",
+    "FairQueue",
+    "MentionPriority",
+    "MentionRewriter",
+    "MentionSchedulerService",
+    "ConversationSummaryService",
 ]
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import TypeVar
 
@@ -31,7 +32,7 @@ class AnthropicService(BaseService):
 
             self.logger.info(f"Calling AnthropicService.chat() with model={model_to_use}")
 
-            raw_response = self.client.messages.create(model=model_to_use, max_tokens=max_tokens, messages=anthropic_messages)
+            raw_response = await asyncio.to_thread(self.client.messages.create, model=model_to_use, max_tokens=max_tokens, messages=anthropic_messages)
 
             return AIChatResponse(
                 model=model_to_use,
@@ -66,7 +67,8 @@ class AnthropicService(BaseService):
                 "input_schema": schema.model_json_schema(),
             }
 
-            raw_response = self.client.messages.create(
+            raw_response = await asyncio.to_thread(
+                self.client.messages.create,
                 model=model_to_use,
                 max_tokens=1024,
                 tools=[tool],
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import TypeVar
 
@@ -51,7 +52,7 @@ class GoogleAIService(BaseService):
             gemini_messages = [self.map_message_to_provider(message, "google") for message in messages]
             self.logger.info(f"Calling GoogleAIService.chat() with model={model_to_use}")
 
-            raw_response = self.client.models.generate_content(model=model_to_use, contents=gemini_messages)
+            raw_response = await asyncio.to_thread(self.client.models.generate_content, model=model_to_use, contents=gemini_messages)
 
             return AIChatResponse(
                 model=model_to_use,
@@ -79,7 +80,8 @@ class GoogleAIService(BaseService):
 
             self.logger.info(f"Calling GoogleAIService.chat_with_schema() with model={model_to_use} and schema={schema.__name__}")
 
-            raw_response = self.client.models.generate_content(
+            raw_response = await asyncio.to_thread(
+                self.client.models.generate_content,
                 model=model_to_use,
                 contents=gemini_messages,
                 config={
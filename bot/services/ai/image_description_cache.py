@@ -0,0 +1,84 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import pymongo
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+class ImageDescriptionCache:
+    """Image descriptions keyed by the SHA-256 of the image bytes, LRU in memory and optionally persisted to MongoDB."""
+
+    def __init__(self, bot: "Juno", max_entries: int, persist: bool, ttl_days: int):
+        self.bot = bot
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+        self.logger = logging.getLogger(__name__)
+        self.collection = None
+
+        if persist:
+            self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
+            self.db = self.mongo_client[self.bot.config.mongoDbName]
+            self.collection = self.db[self.bot.config.mongoImageDescriptionsCollectionName]
+            self._ensure_indexes(ttl_days)
+
+        self.logger.info(f"Initialized ImageDescriptionCache with {max_entries} entries in memory (persist={persist})")
+
+    def _ensure_indexes(self, ttl_days: int):
+        """Create indexes on the collection for faster retrieval."""
+        try:
+            self.collection.create_index([("image_hash", pymongo.ASCENDING)], unique=True)
+            if ttl_days > 0:
+                self.collection.create_index([("created_at", pymongo.ASCENDING)], expireAfterSeconds=ttl_days * 86400)
+            self.logger.info("Created indexes on image descriptions collection")
+        except pymongo.errors.OperationFailure as e:
+            self.logger.warning(f"Could not create indexes: {e}")
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    async def get(self, image_hash: str) -> str | None:
+        if image_hash in self.entries:
+            self.entries.move_to_end(image_hash)
+            self.stats["hits"] += 1
+            return self.entries[image_hash]
+
+        if self.collection is not None:
+            doc = await asyncio.to_thread(self.collection.find_one, {"image_hash": image_hash})
+            if doc:
+                self._put_memory(image_hash, doc["description"])
+                self.stats["hits"] += 1
+                return doc["description"]
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, image_hash: str, description: str):
+        self._put_memory(image_hash, description)
+        if self.collection is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.collection.update_one,
+                {"image_hash": image_hash},
+                {"$set": {"description": description, "created_at": datetime.datetime.now(datetime.UTC)}},
+                upsert=True,
+            )
+        except Exception as e:
+            self.logger.error(f"Error persisting image description {image_hash[:12]}: {e}", exc_info=True)
+
+    def get_metrics(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.stats["hits"], "misses": self.stats["misses"]}
+
+    def _put_memory(self, image_hash: str, description: str):
+        self.entries[image_hash] = description
+        self.entries.move_to_end(image_hash)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
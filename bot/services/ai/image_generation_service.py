@@ -3,10 +3,12 @@ import logging
 from io import BytesIO
 from typing import TYPE_CHECKING
 
-import aiohttp
 from google.genai import Client
+from google.genai import errors as genai_errors
 from PIL import Image
 
+from .image_description_cache import ImageDescriptionCache
+from .image_worker_pool import ImageWorkerPool
 from .types import ImageGenerationResponse, Message, Role
 
 if TYPE_CHECKING:
@@ -14,6 +16,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+DESCRIBE_FAILED = "Unable to describe image"
+MIME_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/gif": "gif"}
+
 
 class ImageGenerationService:
     """Service for generating and editing images using Gemini AI."""
@@ -29,6 +34,11 @@ class ImageGenerationService:
         self.client = Client(api_key=bot.config.aiConfig.gemini.apiKey)
         self.model = model
         self.base_prompt = "You must generate an image with the following user prompt. Do not ask follow questions to get the user to refine the prompt."
+        self.config = bot.config.aiConfig.imageGeneration
+        self.worker_pool = ImageWorkerPool(self.config.workers)
+        self.description_cache = ImageDescriptionCache(bot, self.config.descriptionCacheSize, self.config.descriptionCachePersist, self.config.descriptionCacheTtlDays)
+        self.upload_semaphore = asyncio.Semaphore(self.config.maxConcurrentPreparations)
+        self.upload_tasks: set[asyncio.Task] = set()
 
     async def boost_prompt(self, user_prompt: str, image_description: str | None = None) -> str:
         """
@@ -93,11 +103,7 @@ Please enhance this edit request with specific details while maintaining the con
             logger.info("Generating image description")
 
             # Convert image to base64 for sending to AI
-            buffered = BytesIO()
-            image.save(buffered, format="PNG")
-            import base64
-
-            img_str = base64.b64encode(buffered.getvalue()).decode()
+            img_str = await self.worker_pool.encode_base64(image, format="PNG")
 
             system_message = Message(
                 role=Role.SYSTEM,
@@ -120,7 +126,7 @@ Be specific and thorough as this description will be used for image editing cont
 
         except Exception as e:
             logger.error(f"Error describing image: {e}", exc_info=True)
-            return "Unable to describe image"
+            return DESCRIBE_FAILED
 
     async def download_image_from_url(self, url: str) -> Image.Image | None:
         """
@@ -132,25 +138,12 @@ Be specific and thorough as this description will be used for image editing cont
         Returns:
             PIL Image object if successful, None otherwise
         """
-        try:
-            logger.info(f"Downloading image from: {url}")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        image_data = await resp.read()
-                        image = Image.open(BytesIO(image_data))
-                        logger.info("Image downloaded successfully")
-                        return image
-                    else:
-                        logger.error(f"Failed to download image: HTTP {resp.status}")
-                        return None
-        except Exception as e:
-            logger.error(f"Error downloading image: {e}", exc_info=True)
-            return None
+        images = await self.download_images_from_urls([url])
+        return images[0] if images else None
 
     async def download_images_from_urls(self, urls: list[str]) -> list[Image.Image]:
         """
-        Download multiple images from URLs.
+        Download multiple images from URLs concurrently through the shared attachment cache.
 
         Args:
             urls: List of image URLs to download
@@ -158,11 +151,16 @@ Be specific and thorough as this description will be used for image editing cont
         Returns:
             List of PIL Image objects (excluding failed downloads)
         """
+        logger.info(f"Downloading {len(urls)} image(s)")
         images = []
-        for url in urls:
-            image = await self.download_image_from_url(url)
-            if image:
-                images.append(image)
+        for url, image_data in zip(urls, await self.bot.attachment_download_service.fetch_many(urls), strict=True):
+            if image_data is None:
+                logger.error(f"Failed to download image from: {url}")
+                continue
+            try:
+                images.append(await self.worker_pool.decode(image_data))
+            except Exception as e:
+                logger.error(f"Error decoding image from {url}: {e}", exc_info=True)
         return images
 
     async def generate_image(self, prompt: str) -> ImageGenerationResponse:
@@ -183,21 +181,15 @@ Be specific and thorough as this description will be used for image editing cont
 
             logger.info(f"Generating image with {'boosted ' if self.bot.config.aiConfig.boostImagePrompts else ''}prompt: {boosted_prompt}")
 
-            # Use asyncio.to_thread to avoid blocking
-            response = await asyncio.to_thread(
-                self.client.models.generate_content,
-                model=self.model,
-                contents=[self.base_prompt, boosted_prompt],
-            )
+            response = await self._generate_content([self.base_prompt, boosted_prompt])
 
             image_generation_response = ImageGenerationResponse()
 
             # Extract image from response
             for part in response.candidates[0].content.parts:
                 if part.inline_data is not None:
-                    image = Image.open(BytesIO(part.inline_data.data))
-                    image_generation_response.generated_image = image
-                    logger.info("Image generated successfully")
+                    await self._store_inline_image(image_generation_response, part.inline_data)
+                    logger.info(f"Image generated successfully ({len(part.inline_data.data)} bytes, {image_generation_response.mime_type})")
                 elif part.text is not None:
                     image_generation_response.text_response = part.text
                     logger.info(f"Received text response: {part.text}")
@@ -208,13 +200,14 @@ Be specific and thorough as this description will be used for image editing cont
             logger.error(f"Error generating image: {e}", exc_info=True)
             return None
 
-    async def edit_image(self, prompt: str, source_images: list[Image.Image]) -> ImageGenerationResponse:
+    async def edit_image(self, prompt: str, source_images: list[Image.Image], descriptions: list[str] | None = None) -> ImageGenerationResponse:
         """
         Edit or generate from existing images based on a text prompt.
 
         Args:
             prompt: The text description of how to modify/combine the images
             source_images: List of PIL Images to use as source material
+            descriptions: Optional descriptions already generated for the source images, in the same order
 
         Returns:
             ImageGenerationResponse with edited image and optional text
@@ -222,13 +215,12 @@ Be specific and thorough as this description will be used for image editing cont
         try:
             # Describe the images if boost is enabled
             if self.bot.config.aiConfig.boostImagePrompts and source_images:
-                # For multiple images, describe each
-                descriptions = []
-                for idx, img in enumerate(source_images, 1):
-                    desc = await self.describe_image(img)
-                    descriptions.append(f"Image {idx}: {desc}")
+                # For multiple images, describe each concurrently
+                if descriptions is None:
+                    semaphore = asyncio.Semaphore(self.config.maxConcurrentPreparations)
+                    descriptions = await asyncio.gather(*(self._describe_bounded(image, semaphore) for image in source_images))
 
-                combined_description = "\n\n".join(descriptions)
+                combined_description = "\n\n".join(f"Image {idx}: {desc}" for idx, desc in enumerate(descriptions, 1))
                 boosted_prompt = await self.boost_prompt(prompt, combined_description)
                 logger.info(f"Editing {len(source_images)} image(s) with boosted prompt: {boosted_prompt}")
             else:
@@ -238,12 +230,7 @@ Be specific and thorough as this description will be used for image editing cont
             contents = [self.base_prompt, boosted_prompt]
             contents.extend(source_images)
 
-            # Use asyncio.to_thread to avoid blocking
-            response = await asyncio.to_thread(
-                self.client.models.generate_content,
-                model=self.model,
-                contents=contents,
-            )
+            response = await self._generate_content(contents)
 
             if response.candidates[0].finish_reason.name == "IMAGE_SAFETY":
                 logger.warning(f"Image generation blocked by IMAGE_SAFETY for prompt: {boosted_prompt}")
@@ -256,9 +243,8 @@ Be specific and thorough as this description will be used for image editing cont
             # Extract edited image from response
             for part in response.candidates[0].content.parts:
                 if part.inline_data is not None:
-                    image = Image.open(BytesIO(part.inline_data.data))
-                    image_generation_response.generated_image = image
-                    logger.info("Image edited successfully")
+                    await self._store_inline_image(image_generation_response, part.inline_data)
+                    logger.info(f"Image edited successfully ({len(part.inline_data.data)} bytes, {image_generation_response.mime_type})")
                 elif part.text is not None:
                     image_generation_response.text_response = part.text
                     logger.info(f"Received text response: {part.text}")
@@ -280,11 +266,8 @@ Be specific and thorough as this description will be used for image editing cont
         Returns:
             ImageGenerationResponse with edited image and optional text
         """
-        source_image = await self.download_image_from_url(image_url)
-        if source_image is None:
-            return None
-
-        return await self.edit_image(prompt, source_image)
+        # Goes through the same preparation as several images, so the description cache is keyed by the downloaded bytes
+        return await self.edit_images_from_urls(prompt, [image_url])
 
     async def edit_images_from_urls(self, prompt: str, image_urls: list[str]) -> ImageGenerationResponse:
         """
@@ -297,15 +280,72 @@ Be specific and thorough as this description will be used for image editing cont
         Returns:
             ImageGenerationResponse with edited image and optional text
         """
-        source_images = await self.download_images_from_urls(image_urls)
-        if not source_images:
+        # Each image is downloaded, decoded and described as soon as it can be, the edit starts once all are ready
+        semaphore = asyncio.Semaphore(self.config.maxConcurrentPreparations)
+        prepared = await asyncio.gather(*(self._prepare_source_image(url, semaphore) for url in image_urls))
+        prepared = [(image, description) for image, description in prepared if image is not None]
+        if not prepared:
             logger.error("No images could be downloaded")
             return None
 
-        logger.info(f"Successfully downloaded {len(source_images)}/{len(image_urls)} images")
-        return await self.edit_image(prompt, source_images)
+        logger.info(f"Successfully prepared {len(prepared)}/{len(image_urls)} images")
+        source_images = [image for image, _ in prepared]
+        descriptions = [description for _, description in prepared] if self.bot.config.aiConfig.boostImagePrompts else None
+        return await self.edit_image(prompt, source_images, descriptions)
+
+    async def _prepare_source_image(self, url: str, semaphore: asyncio.Semaphore) -> tuple[Image.Image | None, str | None]:
+        """Download, decode and, when prompts are boosted, describe one source image."""
+        async with semaphore:
+            image_data = await self.bot.attachment_download_service.fetch(url)
+            if image_data is None:
+                logger.error(f"Failed to download image from: {url}")
+                return None, None
+
+            try:
+                image = await self.worker_pool.decode(image_data)
+            except Exception as e:
+                logger.error(f"Error decoding image from {url}: {e}", exc_info=True)
+                return None, None
+
+            description = await self._describe_cached(image, image_data) if self.bot.config.aiConfig.boostImagePrompts else None
+            return image, description
+
+    async def _describe_cached(self, image: Image.Image, image_data: bytes) -> str:
+        """Describe an image unless the same bytes were described before."""
+        image_hash = await self.worker_pool.run("hash", ImageDescriptionCache.hash_bytes, image_data)
+        if description := await self.description_cache.get(image_hash):
+            logger.info(f"Using cached description for image {image_hash[:12]}")
+            return description
 
-    def image_to_bytes(self, image: Image.Image, format: str = "PNG") -> BytesIO:
+        description = await self.describe_image(image)
+        if description != DESCRIBE_FAILED:
+            await self.description_cache.put(image_hash, description)
+        return description
+
+    async def _describe_bounded(self, image: Image.Image, semaphore: asyncio.Semaphore, image_data: bytes | None = None) -> str:
+        async with semaphore:
+            if image_data is None:
+                # Only the pixels are at hand here, so the cache is keyed by their PNG encoding
+                image_data = await self.worker_pool.encode(image, format="PNG")
+            return await self._describe_cached(image, image_data)
+
+    def describe_upload(self, data: bytes):
+        """Describe a delivered image in the background, so a later edit of it finds the description cached."""
+        if not self.bot.config.aiConfig.boostImagePrompts:
+            return
+        task = asyncio.create_task(self._describe_upload(data))
+        self.upload_tasks.add(task)
+        task.add_done_callback(self.upload_tasks.discard)
+
+    async def _describe_upload(self, data: bytes):
+        try:
+            image = await self.worker_pool.decode(data)
+            # Keyed by the uploaded bytes, which are what an edit of the attachment downloads again
+            await self._describe_bounded(image, self.upload_semaphore, data)
+        except Exception as e:
+            logger.warning(f"Could not describe uploaded image: {e}")
+
+    async def image_to_bytes(self, image: Image.Image, format: str = "PNG") -> BytesIO:
         """
         Convert a PIL Image to BytesIO for sending via Discord.
 
@@ -316,10 +356,54 @@ Be specific and thorough as this description will be used for image editing cont
         Returns:
             BytesIO object containing the image data
         """
-        output = BytesIO()
-        image.save(output, format=format)
-        output.seek(0)
-        return output
+        return BytesIO(await self.worker_pool.encode(image, format=format))
+
+    async def get_upload_bytes(self, response: ImageGenerationResponse) -> tuple[bytes, str]:
+        """
+        Get the bytes to upload for a generated image, transcoding only if an output format is configured.
+
+        Args:
+            response: The generation response holding the image
+
+        Returns:
+            Tuple of the encoded image bytes and the file extension to upload them with
+        """
+        output_format = self.config.outputFormat.upper()
+        if output_format:
+            source = response.image_bytes if response.image_bytes is not None else await self.worker_pool.encode(response.generated_image, format="PNG")
+            data = await self.worker_pool.transcode(source, output_format, self.config.outputQuality)
+            logger.info(f"Transcoded generated image to {output_format}: {len(source)} -> {len(data)} bytes")
+            return data, output_format.lower().replace("jpeg", "jpg")
+
+        if response.image_bytes is not None:
+            return response.image_bytes, MIME_EXTENSIONS.get(response.mime_type, "png")
+
+        return await self.worker_pool.encode(response.generated_image, format="PNG"), "png"
+
+    async def _generate_content(self, contents: list):
+        """Call the image model off the event loop, retrying transient failures with exponential backoff."""
+        for attempt in range(1, self.config.maxAttempts + 1):
+            try:
+                return await asyncio.to_thread(self.client.models.generate_content, model=self.model, contents=contents)
+            except Exception as e:
+                if attempt >= self.config.maxAttempts or not self._is_transient_error(e):
+                    raise
+                delay = self.config.retryBackoffSeconds * 2 ** (attempt - 1)
+                logger.warning(f"Transient image generation error on attempt {attempt}/{self.config.maxAttempts}, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        if isinstance(error, genai_errors.APIError):
+            return error.code == 429 or error.code >= 500
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+    async def _store_inline_image(self, response: ImageGenerationResponse, inline_data):
+        """Keep the provider's original bytes, decoding up front only when passthrough is disabled."""
+        response.image_bytes = inline_data.data
+        response.mime_type = inline_data.mime_type or "image/png"
+        if not self.config.passthrough:
+            response.generated_image = await self.worker_pool.decode(inline_data.data)
 
     async def save_image(self, image: Image.Image, filepath: str) -> bool:
         """
@@ -333,9 +417,15 @@ Be specific and thorough as this description will be used for image editing cont
             True if successful, False otherwise
         """
         try:
-            image.save(filepath)
+            await self.worker_pool.save(image, filepath)
             logger.info(f"Image saved to {filepath}")
             return True
         except Exception as e:
             logger.error(f"Error saving image to {filepath}: {e}", exc_info=True)
             return False
+
+    def close(self):
+        """Stop the image worker pool and any background descriptions."""
+        for task in self.upload_tasks:
+            task.cancel()
+        self.worker_pool.shutdown()
@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any
+
+from PIL import Image
+
+
+class ImageWorkerPool:
+    """Runs PIL decode/encode work on a dedicated thread pool so it never blocks the event loop.
+
+    PIL releases the GIL while decoding and compressing, so threads give real parallelism here
+    without the cost of pickling images across a process boundary.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-worker")
+        self.timings: dict[str, dict[str, float]] = {}
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"Initialized ImageWorkerPool with {workers} workers")
+
+    async def run(self, job: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the pool and record how long the job took under its name."""
+        loop = asyncio.get_running_loop()
+        enqueued_at = time.perf_counter()
+
+        def timed() -> tuple[Any, float]:
+            started_at = time.perf_counter()
+            return func(*args), started_at
+
+        try:
+            result, started_at = await loop.run_in_executor(self.executor, timed)
+        except Exception:
+            self._record(job, enqueued_at, enqueued_at, failed=True)
+            raise
+
+        self._record(job, enqueued_at, started_at)
+        return result
+
+    async def decode(self, data: bytes) -> Image.Image:
+        """Fully decode image bytes, Image.open alone defers the pixel decoding to first use."""
+        return await self.run("decode", self._decode, data)
+
+    async def encode(self, image: Image.Image, format: str = "PNG") -> bytes:
+        return await self.run("encode", self._encode, image, format)
+
+    async def encode_base64(self, image: Image.Image, format: str = "PNG") -> str:
+        return await self.run("encode_base64", lambda: base64.b64encode(self._encode(image, format)).decode())
+
+    async def transcode(self, data: bytes, format: str, quality: int) -> bytes:
+        """Decode and re-encode in a single job, dropping alpha for formats that cannot store it."""
+        return await self.run("transcode", self._transcode, data, format, quality)
+
+    async def save(self, image: Image.Image, filepath: str):
+        await self.run("save", image.save, filepath)
+
+    def get_metrics(self) -> dict:
+        return {
+            job: {
+                "count": stats["count"],
+                "failed": stats["failed"],
+                "avg_queue_ms": stats["queue_seconds"] / stats["count"] * 1000 if stats["count"] else 0.0,
+                "avg_run_ms": stats["run_seconds"] / stats["count"] * 1000 if stats["count"] else 0.0,
+                "max_run_ms": stats["max_run_seconds"] * 1000,
+            }
+            for job, stats in self.timings.items()
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, job: str, enqueued_at: float, started_at: float, failed: bool = False):
+        finished_at = time.perf_counter()
+        stats = self.timings.setdefault(job, {"count": 0, "failed": 0, "queue_seconds": 0.0, "run_seconds": 0.0, "max_run_seconds": 0.0})
+        stats["count"] += 1
+        stats["failed"] += int(failed)
+        stats["queue_seconds"] += started_at - enqueued_at
+        stats["run_seconds"] += finished_at - started_at
+        stats["max_run_seconds"] = max(stats["max_run_seconds"], finished_at - started_at)
+        self.logger.debug(f"Image job {job} took {(finished_at - started_at) * 1000:.1f}ms after {(started_at - enqueued_at) * 1000:.1f}ms queued")
+
+    @staticmethod
+    def _decode(data: bytes) -> Image.Image:
+        image = Image.open(BytesIO(data))
+        image.load()
+        return image
+
+    @staticmethod
+    def _encode(image: Image.Image, format: str) -> bytes:
+        output = BytesIO()
+        image.save(output, format=format)
+        return output.getvalue()
+
+    @staticmethod
+    def _transcode(data: bytes, format: str, quality: int) -> bytes:
+        image = Image.open(BytesIO(data))
+        if format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = BytesIO()
+        image.save(output, format=format, quality=quality)
+        return output.getvalue()
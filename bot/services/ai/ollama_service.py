@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import TypeVar
 
@@ -26,7 +27,7 @@ class OllamaService(BaseService):
 
             self.logger.info(f"Calling OllamaService.chat() with model={model_to_use}")
 
-            raw_response = self.client.chat(model=model_to_use, messages=ollama_messages)
+            raw_response = await asyncio.to_thread(self.client.chat, model=model_to_use, messages=ollama_messages)
 
             response = AIChatResponse(
                 model=model_to_use,
@@ -48,7 +49,8 @@ class OllamaService(BaseService):
 
             self.logger.info(f"Calling OllamaService.chat_with_schema() with model={model_to_use} and schema={schema.__name__}")
 
-            raw_response = self.client.chat(
+            raw_response = await asyncio.to_thread(
+                self.client.chat,
                 model=model_to_use,
                 messages=ollama_messages,
                 format=schema.model_json_schema(),
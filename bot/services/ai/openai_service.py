@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import TypeVar
 
@@ -26,7 +27,7 @@ class OpenAIService(BaseService):
 
             self.logger.info(f"Calling OpenAIService.chat() with model={model_to_use}")
 
-            raw_response = self.client.chat.completions.create(model=model_to_use, messages=openai_messages)
+            raw_response = await asyncio.to_thread(self.client.chat.completions.create, model=model_to_use, messages=openai_messages)
 
             return AIChatResponse(
                 model=model_to_use,
@@ -50,7 +51,8 @@ class OpenAIService(BaseService):
 
             self.logger.info(f"Calling OpenAIService.chat_with_schema() with model={model_to_use} and schema={schema.__name__}")
 
-            raw_response = self.client.beta.chat.completions.parse(
+            raw_response = await asyncio.to_thread(
+                self.client.beta.chat.completions.parse,
                 model=model_to_use,
                 messages=openai_messages,
                 response_format=schema,
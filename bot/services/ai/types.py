@@ -72,7 +72,27 @@ class UserIntent(BaseModel):
     reasoning: str = Field(description="Brief explanation of why this intent was chosen")
 
 
+class BatchedReply(BaseModel):
+    """A single reply within a coalesced batch of mentions"""
+
+    mention_index: int = Field(description="The number of the CURRENT MESSAGE this reply answers")
+
+    content: str = Field(description="The reply to send to that user")
+
+
+class BatchedChatResponse(BaseModel):
+    """Structured output for answering several coalesced mentions in one generation"""
+
+    replies: list[BatchedReply] = Field(description="One reply per numbered CURRENT MESSAGE")
+
+
 @dataclass
 class ImageGenerationResponse:
     text_response: str = "Here is your generated image"
     generated_image: PILImage | None = None
+    image_bytes: bytes | None = None
+    mime_type: str | None = None
+
+    @property
+    def has_image(self) -> bool:
+        return self.image_bytes is not None or self.generated_image is not None
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+import aiohttp
+import discord
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+class AttachmentDownloadService:
+    """Shared downloader for attachments with per-host concurrency limits and an LRU cache."""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, bot: "Juno"):
+        self.bot = bot
+        self.config = bot.config.attachmentCache
+        self.logger = logging.getLogger(__name__)
+        self.session: aiohttp.ClientSession | None = None
+        self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.inflight: dict[str, asyncio.Future] = {}
+
+        self.memory_cache: OrderedDict[str, bytes] = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_index: OrderedDict[str, int] = OrderedDict()
+        self.disk_bytes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "downloads": 0, "failures": 0}
+
+        if self.config.diskCachePath:
+            self._load_disk_index()
+
+        self.logger.info(f"Initialized AttachmentDownloadService (max_bytes={self.config.maxBytes}, per_host={self.config.perHostConcurrency}, memory_cache={self.config.memoryCacheBytes}, disk_cache={self.config.diskCachePath or 'disabled'})")
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU from whatever survived the last run, oldest first."""
+        os.makedirs(self.config.diskCachePath, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.config.diskCachePath):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self.disk_index[name] = size
+            self.disk_bytes += size
+
+        self._evict_disk()
+        self.logger.info(f"Loaded {len(self.disk_index)} cached attachments ({self.disk_bytes} bytes) from {self.config.diskCachePath}")
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    @staticmethod
+    def get_cache_key(url: str) -> str:
+        """Key Discord CDN URLs by attachment id, which survives the rotating signed query string."""
+        parsed = urlparse(url)
+        parts = parsed.path.strip("/").split("/")
+        if parsed.hostname in ("cdn.discordapp.com", "media.discordapp.net") and len(parts) >= 3 and parts[0] in ("attachments", "ephemeral-attachments"):
+            return f"discord-{parts[2]}"
+        return hashlib.sha256(f"{parsed.netloc}{parsed.path}".encode()).hexdigest()
+
+    async def fetch_attachments(self, attachments: list[discord.Attachment]) -> list[bytes | None]:
+        """Download several attachments concurrently, preserving order."""
+        return await asyncio.gather(*(self.fetch(att.url, expected_size=att.size) for att in attachments))
+
+    async def fetch_many(self, urls: list[str]) -> list[bytes | None]:
+        """Download several URLs concurrently, preserving order."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    async def fetch(self, url: str, expected_size: int | None = None) -> bytes | None:
+        """Return the bytes behind a URL from cache, or download them once for all concurrent callers."""
+        key = self.get_cache_key(url)
+
+        data = await self._get_cached(key)
+        if data is not None and (expected_size is None or len(data) == expected_size):
+            return data
+
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        data = None
+        try:
+            data = await self._download(url)
+            if data is not None:
+                await self._put_cached(key, data)
+            return data
+        finally:
+            # Waiters see a failed download rather than our cancellation
+            future.set_result(data)
+            del self.inflight[key]
+
+    async def _download(self, url: str) -> bytes | None:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.config.timeoutSeconds))
+
+        host = urlparse(url).netloc
+        semaphore = self.host_semaphores.setdefault(host, asyncio.Semaphore(self.config.perHostConcurrency))
+
+        async with semaphore:
+            try:
+                async with self.session.get(url) as resp:
+                    if resp.status != 200:
+                        self.logger.error(f"Failed to download attachment: HTTP {resp.status}")
+                        self.stats["failures"] += 1
+                        return None
+
+                    if resp.content_length and resp.content_length > self.config.maxBytes:
+                        self.logger.warning(f"Refusing to download {resp.content_length} bytes from {host}, limit is {self.config.maxBytes}")
+                        self.stats["failures"] += 1
+                        return None
+
+                    buffer = bytearray()
+                    async for chunk in resp.content.iter_chunked(self.CHUNK_SIZE):
+                        buffer.extend(chunk)
+                        if len(buffer) > self.config.maxBytes:
+                            self.logger.warning(f"Aborted download from {host} after exceeding {self.config.maxBytes} bytes")
+                            self.stats["failures"] += 1
+                            return None
+
+                    self.stats["downloads"] += 1
+                    return bytes(buffer)
+            except (TimeoutError, aiohttp.ClientError) as e:
+                self.logger.error(f"Failed to download attachment from {host}: {e}")
+                self.stats["failures"] += 1
+                return None
+
+    async def _get_cached(self, key: str) -> bytes | None:
+        if (data := self.memory_cache.get(key)) is not None:
+            self.memory_cache.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return data
+
+        if key in self.disk_index:
+            path = os.path.join(self.config.diskCachePath, key)
+            try:
+                data = await asyncio.to_thread(self._read_file, path)
+            except OSError:
+                self.disk_bytes -= self.disk_index.pop(key)
+                return None
+
+            self.disk_index.move_to_end(key)
+            self.stats["disk_hits"] += 1
+            self._put_memory(key, data)
+            return data
+
+        return None
+
+    async def _put_cached(self, key: str, data: bytes):
+        self._put_memory(key, data)
+
+        if not self.config.diskCachePath or len(data) > self.config.diskCacheBytes:
+            return
+
+        try:
+            await asyncio.to_thread(self._write_file, os.path.join(self.config.diskCachePath, key), data)
+        except OSError as e:
+            self.logger.warning(f"Could not write attachment to disk cache: {e}")
+            return
+
+        if key in self.disk_index:
+            self.disk_bytes -= self.disk_index.pop(key)
+        self.disk_index[key] = len(data)
+        self.disk_bytes += len(data)
+        self._evict_disk()
+
+    def _put_memory(self, key: str, data: bytes):
+        if len(data) > self.config.memoryCacheBytes:
+            return
+
+        if key in self.memory_cache:
+            self.memory_bytes -= len(self.memory_cache.pop(key))
+        self.memory_cache[key] = data
+        self.memory_bytes += len(data)
+
+        while self.memory_bytes > self.config.memoryCacheBytes:
+            _, evicted = self.memory_cache.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.config.diskCacheBytes and self.disk_index:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.config.diskCachePath, key))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
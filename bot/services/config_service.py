@@ -52,6 +52,20 @@ class OpenAiRealTimeConfig:
     voice: str = "alloy"
 
 
+@dataclass
+class ImageGenerationConfig:
+    workers: int = 2
+    passthrough: bool = True
+    outputFormat: Literal["", "webp", "jpeg"] = ""
+    outputQuality: int = 85
+    maxConcurrentPreparations: int = 4
+    descriptionCacheSize: int = 512
+    descriptionCachePersist: bool = False
+    descriptionCacheTtlDays: int = 30
+    maxAttempts: int = 3
+    retryBackoffSeconds: float = 2.0
+
+
 @dataclass
 class AIConfig:
     preferredAiProvider: Literal["ollama", "openai", "antropic", "gemini"] = "google"
@@ -64,6 +78,116 @@ class AIConfig:
     realTimeConfig: OpenAiRealTimeConfig | None = None
     boostImagePrompts: bool = False
     maxDailyImages: int = 1
+    imageGeneration: ImageGenerationConfig = field(default_factory=ImageGenerationConfig)
+
+
+@dataclass
+class MessageIngestionConfig:
+    enabled: bool = False
+    batchSize: int = 100
+    flushIntervalSeconds: float = 2.0
+    maxQueueSize: int = 5000
+    enqueueTimeoutSeconds: float = 1.0
+
+
+@dataclass
+class MessageRetentionConfig:
+    ttlHours: int = 0
+    archiveCollectionName: str = ""
+    archiveTtlHours: int = 0
+    bucketed: bool = False
+    bucketMinutes: int = 10
+
+
+@dataclass
+class AttachmentCacheConfig:
+    maxBytes: int = 25 * 1024 * 1024
+    timeoutSeconds: float = 30.0
+    perHostConcurrency: int = 4
+    memoryCacheBytes: int = 64 * 1024 * 1024
+    diskCachePath: str = ""
+    diskCacheBytes: int = 512 * 1024 * 1024
+
+
+@dataclass
+class MentionCoalescingConfig:
+    enabled: bool = False
+    windowMs: int = 1500
+    maxBatchSize: int = 5
+
+
+@dataclass
+class MentionSchedulerConfig:
+    workers: int = 4
+    maxQueuePerGuild: int = 10
+    maxQueueTotal: int = 100
+    overloadMessage: str = "I'm juggling a lot of messages right now, give me a moment and try again!"
+
+
+@dataclass
+class ImageJobsConfig:
+    workers: int = 2
+    maxQueuePerGuild: int = 5
+    maxQueueTotal: int = 50
+    maxAttempts: int = 3
+    recordTtlHours: int = 168
+    queueFullMessage: str = "Too many images are being generated right now, try again in a bit!"
+    failedMessage: str = "Sorry, I couldn't generate that image."
+
+
+@dataclass
+class OutboundDispatchConfig:
+    messagesPerWindow: int = 5
+    windowSeconds: float = 5.0
+    mergeAdjacent: bool = True
+    maxRetries: int = 2
+
+
+@dataclass
+class MusicConfig:
+    extractWorkers: int = 4
+    extractTimeoutSeconds: float = 30.0
+    metadataCacheSize: int = 1024
+    metadataCachePersist: bool = False
+    metadataCacheTtlDays: int = 30
+    streamUrlTtlSeconds: int = 3600
+    streamUrlExpiryMarginSeconds: int = 300
+    prefetchTracks: int = 2
+    prefetchLeadSeconds: int = 15
+    opusPassthrough: bool = True
+    opusBitrate: int = 128
+    fileCachePath: str = ""
+    fileCacheBytes: int = 1073741824
+    fileCacheMaxTrackBytes: int = 104857600
+    fileCacheDownloads: int = 2
+    fileCacheNextTrack: bool = True
+    persistState: bool = False
+    resumeOnStartup: bool = False
+    resumeMaxAgeMinutes: int = 30
+    stateFlushSeconds: float = 2.0
+    stateCheckpointSeconds: float = 15.0
+    reapIntervalSeconds: float = 30.0
+    emptyChannelTimeoutSeconds: float = 60.0
+    idleTimeoutMinutes: float = 10.0
+
+
+@dataclass
+class RateLimitConfig:
+    maxEntriesPerPolicy: int = 10000
+    policies: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class ConversationSummaryConfig:
+    enabled: bool = False
+    preferredAiProvider: str = ""
+    preferredModel: str = ""
+    messagesPerUpdate: int = 20
+    maxMessagesPerUpdate: int = 100
+    rawMessages: int = 4
+    maxSummaryChars: int = 2000
+    initialLookbackHours: int = 6
+    maxCachedChannels: int = 1000
 
 
 @dataclass
@@ -77,6 +201,7 @@ class Config:
     usersToId: dict[str, str] = field(default_factory=dict)
     idToUsers: dict[str, str] = field(default_factory=dict)
     mentionCooldown: int = 20
+    maxResponseChunks: int = 4
     cooldownBypassList: list[int] = field(default_factory=list)
     promptsPath: str = "prompts.json"
     morningConfigsPath: str = "morning_configs.json"
@@ -84,8 +209,25 @@ class Config:
     mongoUri: str = ""
     mongoDbName: str = ""
     mongoMessagesCollectionName: str = ""
+    messageIngestion: MessageIngestionConfig = field(default_factory=MessageIngestionConfig)
+    messageRetention: MessageRetentionConfig = field(default_factory=MessageRetentionConfig)
+    attachmentCache: AttachmentCacheConfig = field(default_factory=AttachmentCacheConfig)
+    mentionCoalescing: MentionCoalescingConfig = field(default_factory=MentionCoalescingConfig)
+    mentionScheduler: MentionSchedulerConfig = field(default_factory=MentionSchedulerConfig)
+    rateLimits: RateLimitConfig = field(default_factory=RateLimitConfig)
+    outboundDispatch: OutboundDispatchConfig = field(default_factory=OutboundDispatchConfig)
+    imageJobs: ImageJobsConfig = field(default_factory=ImageJobsConfig)
+    music: MusicConfig = field(default_factory=MusicConfig)
+    conversationSummary: ConversationSummaryConfig = field(default_factory=ConversationSummaryConfig)
+    metricsLogIntervalSeconds: int = 300
     mongoMorningConfigsCollectionName: str = "morning_configs"
     mongoImageLimitsCollectionName: str = "image_limits"
+    mongoImageUsageCollectionName: str = "image_usage"
+    mongoSummariesCollectionName: str = "conversation_summaries"
+    mongoImageDescriptionsCollectionName: str = "image_descriptions"
+    mongoImageJobsCollectionName: str = "image_jobs"
+    mongoAudioMetadataCollectionName: str = "audio_metadata"
+    mongoMusicStateCollectionName: str = "music_state"
     allowedBotsToRespondTo: list[int] = field(default_factory=list)
 
     @property
@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import discord
+import pymongo
+from bson import Int64
+
+from .ai.ai_service_factory import AiServiceFactory
+from .ai.types import Message
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+class ConversationSummaryService:
+    """Keeps an incrementally updated summary of each channel's conversation, cached in memory and persisted to MongoDB.
+
+    Only the maxCachedChannels most recently active channels are kept in memory, the rest are reloaded from MongoDB
+    when they next see a message.
+    """
+
+    def __init__(self, bot: "Juno"):
+        self.bot = bot
+        self.config = bot.config.conversationSummary
+        self.logger = logging.getLogger(__name__)
+        self.summaries: OrderedDict[int, dict] = OrderedDict()
+        self.updating: set[int] = set()
+
+        if not self.config.enabled:
+            self.logger.info("Conversation summaries are disabled")
+            return
+
+        provider = self.config.preferredAiProvider or bot.config.aiConfig.orchestrator.preferredAiProvider
+        self.ai_service = AiServiceFactory.get_service(provider=provider, config=bot.config)
+        self.model = self.config.preferredModel or bot.config.aiConfig.orchestrator.preferredModel
+
+        self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
+        self.db = self.mongo_client[self.bot.config.mongoDbName]
+        self.collection = self.db[self.bot.config.mongoSummariesCollectionName]
+        self._ensure_indexes()
+        self.logger.info(f"Initialized ConversationSummaryService with provider={provider}, model={self.model}, updating every {self.config.messagesPerUpdate} messages")
+
+    def _ensure_indexes(self):
+        """Create indexes on the collection for faster retrieval."""
+        try:
+            self.collection.create_index([("channel_id", pymongo.ASCENDING)], unique=True)
+            self.logger.info("Created indexes on conversation summaries collection")
+        except pymongo.errors.OperationFailure as e:
+            self.logger.warning(f"Could not create indexes: {e}")
+
+    async def note_message(self, message: discord.Message):
+        """Count a new channel message and kick off a background update once enough have accumulated."""
+        if not self.config.enabled or not message.guild:
+            return
+
+        state = await self._get_state(message.guild.id, message.channel.id)
+        state["pending"] += 1
+
+        if state["pending"] >= self.config.messagesPerUpdate and message.channel.id not in self.updating:
+            self.updating.add(message.channel.id)
+            asyncio.create_task(self._update_summary(state))
+
+    def get_summary(self, channel_id: int) -> str | None:
+        """Return the cached summary for a channel, if one has been generated."""
+        if not self.config.enabled:
+            return None
+        state = self.summaries.get(channel_id)
+        return state["summary"] if state and state["summary"] else None
+
+    def get_summarized_until(self, channel_id: int) -> datetime.datetime | None:
+        """Timestamp of the newest message folded into the channel's cached summary."""
+        if not self.config.enabled:
+            return None
+        state = self.summaries.get(channel_id)
+        return state["summarized_until"] if state else None
+
+    async def _get_state(self, guild_id: int, channel_id: int) -> dict:
+        if channel_id in self.summaries:
+            self.summaries.move_to_end(channel_id)
+        else:
+            doc = await asyncio.to_thread(self.collection.find_one, {"channel_id": Int64(channel_id)})
+            self.summaries[channel_id] = {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "summary": doc.get("summary", "") if doc else "",
+                "summarized_until": doc.get("summarized_until") if doc else None,
+                "pending": 0,
+            }
+            self._evict()
+        return self.summaries[channel_id]
+
+    def _evict(self):
+        # Channels with an update in flight stay, so the update's write isn't raced by a reload of the old summary
+        for channel_id in list(self.summaries):
+            if len(self.summaries) <= self.config.maxCachedChannels:
+                break
+            if channel_id not in self.updating:
+                del self.summaries[channel_id]
+
+    async def _update_summary(self, state: dict):
+        channel_id = state["channel_id"]
+        try:
+            if state["summarized_until"]:
+                # Mongo dates have millisecond precision, step past the last summarized message
+                since = state["summarized_until"] + datetime.timedelta(milliseconds=1)
+            else:
+                since = (datetime.datetime.now(datetime.UTC) - datetime.timedelta(hours=self.config.initialLookbackHours)).replace(tzinfo=None)
+
+            new_messages = await asyncio.to_thread(self.bot.discord_messages_service.find_messages, state["guild_id"], channel_id, since, self.config.maxMessagesPerUpdate)
+            if not new_messages:
+                state["pending"] = 0
+                return
+
+            transcript_lines = []
+            for msg in new_messages:
+                author_name = self.bot.config.idToUsers.get(str(msg["author_id"]), msg["author_name"])
+                transcript_lines.append(f"[{author_name}]: {msg['content'].strip()}")
+
+            messages = [
+                Message(
+                    role="system",
+                    content=f"""You maintain a running summary of a Discord group chat.
+Merge the new messages into the existing summary. Keep who said what, open questions, ongoing topics and running jokes.
+Drop details that no longer matter. Keep it under {self.config.maxSummaryChars} characters.
+Return ONLY the updated summary.""",
+                ),
+                Message(role="user", content=f"EXISTING SUMMARY:\n{state['summary'] or '(none yet)'}\n\nNEW MESSAGES:\n" + "\n".join(transcript_lines)),
+            ]
+
+            response = await self.ai_service.chat(messages=messages, model=self.model)
+            if not response.raw_response:
+                self.logger.warning(f"Summary update failed for channel {channel_id}, keeping the previous summary")
+                return
+
+            state["summary"] = response.content.strip()[: self.config.maxSummaryChars]
+            state["summarized_until"] = new_messages[-1]["timestamp"]
+            state["pending"] = 0
+
+            await asyncio.to_thread(
+                self.collection.update_one,
+                {"channel_id": Int64(channel_id)},
+                {"$set": {"guild_id": Int64(state["guild_id"]), "summary": state["summary"], "summarized_until": state["summarized_until"], "updated_at": datetime.datetime.now(datetime.UTC)}},
+                upsert=True,
+            )
+            self.logger.info(f"Updated conversation summary for channel {channel_id} with {len(new_messages)} new messages")
+        except Exception as e:
+            self.logger.error(f"Error updating conversation summary for channel {channel_id}: {e}", exc_info=True)
+        finally:
+            self.updating.discard(channel_id)
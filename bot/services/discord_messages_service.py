@@ -15,20 +15,98 @@ if TYPE_CHECKING:
 class DiscordMessagesService:
     def __init__(self, bot: "Juno"):
         self.bot = bot
+        self.retention = self.bot.config.messageRetention
         self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
         self.db = self.mongo_client[self.bot.config.mongoDbName]
         self.messages_collection = self.db[self.bot.config.mongoMessagesCollectionName]
+        self.buckets_collection = self.db[f"{self.bot.config.mongoMessagesCollectionName}_buckets"]
+        self.archive_collection = self.db[self.retention.archiveCollectionName] if self.retention.archiveCollectionName else None
         self.logger = logging.getLogger(__name__)
-        self.logger.info(f"Initialized DiscordMessagesService with collection {self.messages_collection.name}")
+
+        self._ensure_indexes()
+        self.logger.info(f"Initialized DiscordMessagesService with collection {self.buckets_collection.name if self.retention.bucketed else self.messages_collection.name}")
+
+    def _ensure_indexes(self):
+        """Create the lookup and retention indexes for the configured layout."""
+        try:
+            self.messages_collection.create_index([("guild_id", pymongo.ASCENDING), ("channel_id", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+            self.messages_collection.create_index([("message_id", pymongo.ASCENDING)])
+            if self.retention.ttlHours > 0:
+                self._ensure_ttl_index(self.messages_collection, "timestamp", self.retention.ttlHours * 3600)
+
+            if self.retention.bucketed:
+                self.buckets_collection.create_index([("guild_id", pymongo.ASCENDING), ("channel_id", pymongo.ASCENDING), ("bucket_start", pymongo.ASCENDING)], unique=True)
+                if self.retention.ttlHours > 0:
+                    self._ensure_ttl_index(self.buckets_collection, "bucket_end", self.retention.ttlHours * 3600)
+
+            if self.archive_collection is not None:
+                self.archive_collection.create_index([("guild_id", pymongo.ASCENDING), ("channel_id", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+                self.archive_collection.create_index([("message_id", pymongo.ASCENDING)])
+                if self.retention.archiveTtlHours > 0:
+                    self._ensure_ttl_index(self.archive_collection, "timestamp", self.retention.archiveTtlHours * 3600)
+
+            self.logger.info("Created indexes on messages collections")
+        except pymongo.errors.OperationFailure as e:
+            self.logger.warning(f"Could not create indexes: {e}")
+
+    def _ensure_ttl_index(self, collection: pymongo.collection.Collection, field_name: str, expire_after_seconds: int):
+        """Create a TTL index, or update the expiry in place if the index already exists."""
+        try:
+            collection.create_index([(field_name, pymongo.ASCENDING)], expireAfterSeconds=expire_after_seconds)
+        except pymongo.errors.OperationFailure as e:
+            # IndexOptionsConflict: the key is already indexed with different options
+            if e.code != 85:
+                raise
+            self.db.command("collMod", collection.name, index={"keyPattern": {field_name: 1}, "expireAfterSeconds": expire_after_seconds})
+            self.logger.info(f"Updated TTL on {collection.name}.{field_name} to {expire_after_seconds}s")
+
+    def get_bucket_start(self, timestamp: datetime.datetime) -> datetime.datetime:
+        """Floor a naive UTC timestamp to the start of its storage bucket."""
+        bucket_seconds = self.retention.bucketMinutes * 60
+        epoch_seconds = int(timestamp.replace(tzinfo=datetime.UTC).timestamp())
+        return datetime.datetime.fromtimestamp(epoch_seconds - epoch_seconds % bucket_seconds, datetime.UTC).replace(tzinfo=None)
 
     def get_last_n_messages_within_n_minutes(self, message: discord.Message, n: int, minutes: int) -> list[dict]:
         """Returns raw message data instead of Message objects"""
         time_threshold = (datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=minutes)).replace(tzinfo=None)
-        query = {"guild_id": Int64(message.guild.id), "channel_id": Int64(message.channel.id), "timestamp": {"$gte": time_threshold}, "message_id": {"$ne": Int64(message.id)}, "deleted": False}
-        messages = list(self.messages_collection.find(query).sort({"timestamp": 1}).limit(n))
+        messages = self.find_messages(message.guild.id, message.channel.id, time_threshold, n, exclude_message_id=message.id)
         self.logger.info(f"Fetched {len(messages)} messages for guild_id {message.guild.id}:{message.channel.id}")
         return messages
 
+    def get_recent_messages(self, message: discord.Message, n: int, minutes: int) -> list[dict]:
+        """Returns the n newest messages within the window, oldest first"""
+        time_threshold = (datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=minutes)).replace(tzinfo=None)
+        messages = self.find_messages(message.guild.id, message.channel.id, time_threshold, n, exclude_message_id=message.id, newest=True)
+        self.logger.info(f"Fetched {len(messages)} recent messages for guild_id {message.guild.id}:{message.channel.id}")
+        return messages
+
+    def find_messages(self, guild_id: int, channel_id: int, since: datetime.datetime, n: int, exclude_message_id: int | None = None, newest: bool = False) -> list[dict]:
+        """Find up to n non-deleted messages after since, in timestamp order. With newest, the n latest are kept instead of the n earliest."""
+        if self.retention.bucketed:
+            return self._find_bucketed_messages(guild_id, channel_id, since, n, exclude_message_id, newest)
+
+        query = {"guild_id": Int64(guild_id), "channel_id": Int64(channel_id), "timestamp": {"$gte": since}, "deleted": False}
+        if exclude_message_id is not None:
+            query["message_id"] = {"$ne": Int64(exclude_message_id)}
+
+        messages = list(self.messages_collection.find(query).sort({"timestamp": -1 if newest else 1}).limit(n))
+        return messages[::-1] if newest else messages
+
+    def _find_bucketed_messages(self, guild_id: int, channel_id: int, since: datetime.datetime, n: int, exclude_message_id: int | None, newest: bool) -> list[dict]:
+        """Read the buckets covering the window and flatten them in timestamp order."""
+        query = {"guild_id": Int64(guild_id), "channel_id": Int64(channel_id), "bucket_start": {"$gte": self.get_bucket_start(since)}}
+        buckets = self.buckets_collection.find(query, {"messages": 1}).sort({"bucket_start": -1 if newest else 1})
+
+        messages = []
+        for bucket in buckets:
+            for msg in sorted(bucket.get("messages", []), key=lambda m: m["timestamp"], reverse=newest):
+                if msg["timestamp"] < since or msg["message_id"] == exclude_message_id or msg.get("deleted"):
+                    continue
+                messages.append(msg)
+                if len(messages) >= n:
+                    return messages[::-1] if newest else messages
+        return messages[::-1] if newest else messages
+
     def convert_db_message_to_ai_message(self, db_message) -> Message:
         role = "user" if db_message["author_id"] != self.bot.user.id else "assistant"
         user = self.bot.config.usersToId.get(db_message["author_id"], db_message["author_name"])
@@ -0,0 +1,63 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class FairQueue(Generic[T]):
+    """Bounded queue with strict priority lanes and round-robin fairness across keys within a lane.
+
+    Lane 0 is always drained first. Inside a lane each key (e.g. a guild id) gets one item per turn,
+    so a single busy key cannot starve the others. All operations are O(1).
+    """
+
+    def __init__(self, lanes: int, max_per_key: int, max_total: int):
+        self.lanes: list[OrderedDict[int, deque[T]]] = [OrderedDict() for _ in range(lanes)]
+        self.max_per_key = max_per_key
+        self.max_total = max_total
+        self.key_depths: dict[int, int] = {}
+        self.size = 0
+        self.available = asyncio.Semaphore(0)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def is_full(self, key: int) -> bool:
+        return self.size >= self.max_total or self.key_depths.get(key, 0) >= self.max_per_key
+
+    def put_nowait(self, key: int, item: T, lane: int = 0) -> bool:
+        """Add an item for a key. Returns False instead of raising when the key or the queue is full."""
+        if self.is_full(key):
+            return False
+
+        self.lanes[lane].setdefault(key, deque()).append(item)
+        self.key_depths[key] = self.key_depths.get(key, 0) + 1
+        self.size += 1
+        self.available.release()
+        return True
+
+    async def get(self) -> T:
+        """Wait for the next item by lane priority, then by key rotation."""
+        await self.available.acquire()
+        for lane in self.lanes:
+            if not lane:
+                continue
+
+            key, items = lane.popitem(last=False)
+            item = items.popleft()
+            if items:
+                # Send the key to the back of the rotation
+                lane[key] = items
+
+            self.size -= 1
+            if self.key_depths[key] == 1:
+                del self.key_depths[key]
+            else:
+                self.key_depths[key] -= 1
+            return item
+
+        raise RuntimeError("FairQueue semaphore and lanes are out of sync")
+
+    def lane_depths(self) -> list[int]:
+        return [sum(len(items) for items in lane.values()) for lane in self.lanes]
@@ -0,0 +1,281 @@
+import asyncio
+import datetime
+import io
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import discord
+import pymongo
+from bson import Int64, ObjectId
+
+from .fair_queue import FairQueue
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+@dataclass
+class ImageJob:
+    guild_id: int
+    channel_id: int
+    message_id: int
+    user_id: int
+    prompt: str
+    image_urls: list[str]
+    attempts: int = 0
+    status_message_id: int | None = None
+    reservation: dict | None = None
+    id: ObjectId = field(default_factory=ObjectId)
+    message: discord.Message | discord.PartialMessage | None = None
+
+    def to_document(self) -> dict:
+        return {
+            "_id": self.id,
+            "guild_id": Int64(self.guild_id),
+            "channel_id": Int64(self.channel_id),
+            "message_id": Int64(self.message_id),
+            "user_id": Int64(self.user_id),
+            "prompt": self.prompt,
+            "image_urls": self.image_urls,
+            "attempts": self.attempts,
+            "status_message_id": Int64(self.status_message_id) if self.status_message_id else None,
+            "reservation": self.reservation,
+            "status": "queued",
+            "created_at": datetime.datetime.now(datetime.UTC),
+            "updated_at": datetime.datetime.now(datetime.UTC),
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "ImageJob":
+        return cls(
+            id=doc["_id"],
+            guild_id=doc["guild_id"],
+            channel_id=doc["channel_id"],
+            message_id=doc["message_id"],
+            user_id=doc["user_id"],
+            prompt=doc["prompt"],
+            image_urls=doc.get("image_urls", []),
+            attempts=doc.get("attempts", 0),
+            status_message_id=doc.get("status_message_id"),
+            reservation=doc.get("reservation"),
+        )
+
+
+class ImageJobService:
+    """Runs image generation jobs on a bounded worker pool, fairly across guilds, with job records in MongoDB."""
+
+    def __init__(self, bot: "Juno"):
+        self.bot = bot
+        self.config = bot.config.imageJobs
+        self.queue: FairQueue[ImageJob] = FairQueue(lanes=1, max_per_key=self.config.maxQueuePerGuild, max_total=self.config.maxQueueTotal)
+        self.workers: list[asyncio.Task] = []
+        self.recovery_task: asyncio.Task | None = None
+        self.started_at: datetime.datetime | None = None
+        self.active = 0
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "recovered": 0}
+        self.logger = logging.getLogger(__name__)
+
+        self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
+        self.db = self.mongo_client[self.bot.config.mongoDbName]
+        self.collection = self.db[self.bot.config.mongoImageJobsCollectionName]
+        self._ensure_indexes()
+        self.logger.info(f"Initialized ImageJobService with {self.config.workers} workers (max_per_guild={self.config.maxQueuePerGuild}, max_total={self.config.maxQueueTotal})")
+
+    def _ensure_indexes(self):
+        """Create indexes on the collection for faster retrieval."""
+        try:
+            self.collection.create_index([("status", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)])
+            if self.config.recordTtlHours > 0:
+                self.collection.create_index([("updated_at", pymongo.ASCENDING)], expireAfterSeconds=self.config.recordTtlHours * 3600)
+            self.logger.info("Created indexes on image jobs collection")
+        except pymongo.errors.OperationFailure as e:
+            self.logger.warning(f"Could not create indexes: {e}")
+
+    def start(self):
+        if self.workers:
+            return
+        self.started_at = datetime.datetime.now(datetime.UTC)
+        self.workers = [asyncio.create_task(self._worker(), name=f"image-worker-{idx}") for idx in range(self.config.workers)]
+        self.recovery_task = asyncio.create_task(self._recover_jobs())
+
+    async def stop(self):
+        # Jobs left queued or running keep their records and are picked up again on the next start
+        tasks = [*self.workers, self.recovery_task] if self.recovery_task else self.workers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.recovery_task = None
+
+    async def submit(self, message: discord.Message, image_urls: list[str], reservation: dict) -> bool:
+        """Queue an image job for a message whose image quota is already reserved, and acknowledge it with its queue position.
+
+        The reservation is committed once the image is delivered and released on every other outcome. Returns False if the queue is full.
+        """
+        job = ImageJob(
+            guild_id=message.guild.id if message.guild else 0,
+            channel_id=message.channel.id,
+            message_id=message.id,
+            user_id=message.author.id,
+            prompt=message.content,
+            image_urls=image_urls,
+            reservation=reservation,
+            message=message,
+        )
+
+        if self.queue.is_full(job.guild_id):
+            return await self._reject(job, message)
+
+        position = len(self.queue) + self.active + 1
+        try:
+            status_message = await self.bot.outbound_dispatch_service.send(message.channel, f"🎨 Queued your image, you're #{position} in line.", reference=message)
+            job.status_message_id = status_message.id
+        except Exception as e:
+            self.logger.warning(f"Could not acknowledge image job {job.id}: {e}")
+
+        # The record is written before the job becomes visible to workers so their status updates always find it
+        try:
+            await asyncio.to_thread(self.collection.insert_one, job.to_document())
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"Could not record image job {job.id}: {e}", exc_info=True)
+            await self._release(job)
+            if job.status_message_id:
+                await self._edit_status_message(job, self.config.failedMessage)
+            else:
+                await self.bot.response_service.send_response(message, self.config.failedMessage)
+            return False
+
+        if not self.queue.put_nowait(job.guild_id, job):
+            await self._release(job)
+            await self._set_status(job, "failed", error="Queue full")
+            await self._edit_status_message(job, self.config.queueFullMessage)
+            self.stats["rejected"] += 1
+            return False
+
+        self.stats["submitted"] += 1
+        self.logger.info(f"Queued image job {job.id} for {message.author.name} at position {position}")
+        return True
+
+    async def _reject(self, job: ImageJob, message: discord.Message) -> bool:
+        await self._release(job)
+        self.stats["rejected"] += 1
+        self.logger.warning(f"Rejecting image job for guild {job.guild_id}: queue depth {len(self.queue)}")
+        await self.bot.response_service.send_response(message, self.config.queueFullMessage)
+        return False
+
+    def get_metrics(self) -> dict:
+        return {"queued": len(self.queue), "queued_by_guild": dict(self.queue.key_depths), "active": self.active, "workers": self.config.workers, **self.stats}
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.active += 1
+            try:
+                await self._run_job(job)
+            finally:
+                self.active -= 1
+
+    async def _run_job(self, job: ImageJob):
+        await self._set_status(job, "running", attempts=job.attempts + 1)
+        await self._edit_status_message(job, "🎨 Generating your image...")
+
+        try:
+            message = job.message or self._get_partial_message(job.channel_id, job.message_id)
+            if message is None:
+                raise RuntimeError(f"Channel {job.channel_id} is no longer available")
+
+            if job.image_urls:
+                self.logger.info(f"Editing/combining {len(job.image_urls)} image(s) for job {job.id}")
+                response = await self.bot.image_generation_service.edit_images_from_urls(prompt=job.prompt, image_urls=job.image_urls)
+            else:
+                response = await self.bot.image_generation_service.generate_image(prompt=job.prompt)
+
+            if response is None:
+                raise RuntimeError("Image generation failed")
+
+            if response.has_image:
+                image_data, extension = await self.bot.image_generation_service.get_upload_bytes(response)
+                filename = f"{'edited_image' if job.image_urls else 'generated_image'}.{extension}"
+                await self.bot.response_service.send_response(message, response.text_response, discord.File(io.BytesIO(image_data), filename=filename))
+                self.bot.image_limit_service.commit(job.user_id, job.guild_id)
+                self.bot.image_generation_service.describe_upload(image_data)
+            else:
+                # No image was delivered (e.g. blocked by safety filters), so it does not count against the limit
+                await self.bot.response_service.send_response(message, response.text_response)
+                await self._release(job)
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"Image job {job.id} failed: {e}", exc_info=True)
+            await self._release(job)
+            await self._set_status(job, "failed", error=str(e))
+            await self._edit_status_message(job, self.config.failedMessage)
+            return
+
+        self.stats["completed"] += 1
+        await self._set_status(job, "done")
+        await self._delete_status_message(job)
+
+    async def _recover_jobs(self):
+        """Requeue jobs that were queued or running when the bot last stopped."""
+        await self.bot.wait_until_ready()
+        # Jobs submitted since this start are already queued, only the ones left over from before it need recovering
+        query = {"status": {"$in": ["queued", "running"]}, "created_at": {"$lt": self.started_at}}
+        docs = await asyncio.to_thread(lambda: list(self.collection.find(query).sort("created_at", pymongo.ASCENDING)))
+
+        for doc in docs:
+            job = ImageJob.from_document(doc)
+            if job.attempts >= self.config.maxAttempts:
+                self.logger.warning(f"Dropping image job {job.id} after {job.attempts} interrupted attempts")
+                await self._release(job)
+                await self._set_status(job, "failed", error="Interrupted too many times")
+                await self._edit_status_message(job, self.config.failedMessage)
+                continue
+
+            if not self.queue.put_nowait(job.guild_id, job):
+                await self._release(job)
+                await self._set_status(job, "failed", error="Queue full during recovery")
+                await self._edit_status_message(job, self.config.queueFullMessage)
+                continue
+
+            await self._set_status(job, "queued")
+            await self._edit_status_message(job, "🎨 I restarted, your image is back in the queue.")
+            self.stats["recovered"] += 1
+
+        if docs:
+            self.logger.info(f"Recovered {self.stats['recovered']} of {len(docs)} interrupted image jobs")
+
+    async def _set_status(self, job: ImageJob, status: str, **fields):
+        if "attempts" in fields:
+            job.attempts = fields["attempts"]
+        try:
+            await asyncio.to_thread(self.collection.update_one, {"_id": job.id}, {"$set": {"status": status, "updated_at": datetime.datetime.now(datetime.UTC), **fields}})
+        except Exception as e:
+            self.logger.error(f"Error updating image job {job.id} to {status}: {e}")
+
+    async def _release(self, job: ImageJob):
+        try:
+            await asyncio.to_thread(self.bot.image_limit_service.release, job.user_id, job.guild_id, job.reservation)
+        except Exception as e:
+            self.logger.error(f"Error releasing image reservation for job {job.id}: {e}")
+
+    def _get_partial_message(self, channel_id: int, message_id: int) -> discord.PartialMessage | None:
+        channel = self.bot.get_channel(channel_id)
+        return channel.get_partial_message(message_id) if channel else None
+
+    async def _edit_status_message(self, job: ImageJob, content: str):
+        if not job.status_message_id or not (status_message := self._get_partial_message(job.channel_id, job.status_message_id)):
+            return
+        try:
+            await status_message.edit(content=content)
+        except discord.HTTPException as e:
+            self.logger.debug(f"Could not update status message for image job {job.id}: {e}")
+
+    async def _delete_status_message(self, job: ImageJob):
+        if not job.status_message_id or not (status_message := self._get_partial_message(job.channel_id, job.status_message_id)):
+            return
+        try:
+            await status_message.delete()
+        except discord.HTTPException as e:
+            self.logger.debug(f"Could not delete status message for image job {job.id}: {e}")
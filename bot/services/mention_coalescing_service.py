@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import discord
+
+
+@dataclass
+class PendingMention:
+    message: discord.Message
+    reference_message: discord.Message | None
+    user: discord.User
+
+
+class MentionCoalescingService:
+    """Batches mentions that land in the same channel within a short window into one generation."""
+
+    def __init__(self, window_ms: int, max_batch_size: int, handler: Callable[[list[PendingMention]], Awaitable[None]]):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.handler = handler
+        self.pending: dict[int, list[PendingMention]] = {}
+        self.timers: dict[int, asyncio.Task] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, message: discord.Message, reference_message: discord.Message | None, user: discord.User):
+        """Queue a mention for its channel's batch. Returns right away, the batch goes to the handler once the window closes."""
+        channel_id = message.channel.id
+        mention = PendingMention(message=message, reference_message=reference_message, user=user)
+
+        batch = self.pending.setdefault(channel_id, [])
+        batch.append(mention)
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(channel_id)
+        elif channel_id not in self.timers:
+            self.timers[channel_id] = asyncio.create_task(self._flush_after_window(channel_id))
+
+    async def _flush_after_window(self, channel_id: int):
+        await asyncio.sleep(self.window_seconds)
+        self.timers.pop(channel_id, None)
+        self._flush(channel_id)
+
+    def _flush(self, channel_id: int):
+        if timer := self.timers.pop(channel_id, None):
+            timer.cancel()
+
+        batch = self.pending.pop(channel_id, [])
+        if batch:
+            self.logger.info(f"Coalesced {len(batch)} mention(s) in channel {channel_id}")
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list[PendingMention]):
+        try:
+            await self.handler(batch)
+        except Exception as e:
+            self.logger.error(f"Error handling coalesced mentions: {e}", exc_info=True)
@@ -0,0 +1,53 @@
+import logging
+import re
+
+DISCORD_MENTION_PATTERN = re.compile(r"<@!?(\d+)>")
+
+
+class MentionRewriter:
+    """Rewrites names to Discord mentions and back in a single pass over the text.
+
+    All configured names are compiled once into one alternation, longest first so that
+    overlapping names prefer the most specific match. Call reload when the mappings change.
+    """
+
+    def __init__(self, names_to_ats: dict[str, str], ids_to_names: dict[str, str]):
+        self.logger = logging.getLogger(__name__)
+        self.reload(names_to_ats, ids_to_names)
+
+    def reload(self, names_to_ats: dict[str, str], ids_to_names: dict[str, str]):
+        """Rebuild the lookup tables and the combined name pattern."""
+        self.names_to_ats = {name.lower(): at for name, at in names_to_ats.items()}
+        self.ids_to_names = {str(user_id): name for user_id, name in ids_to_names.items()}
+
+        if self.names_to_ats:
+            names = sorted(self.names_to_ats, key=len, reverse=True)
+            # An optional opening backtick makes the closing one mandatory, so `name` is unwrapped in the same match
+            self.name_pattern = re.compile(r"(`)?\b(" + "|".join(map(re.escape, names)) + r")\b(?(1)`)", re.IGNORECASE)
+        else:
+            self.name_pattern = None
+
+        self.logger.info(f"Compiled mention rewriter for {len(self.names_to_ats)} names and {len(self.ids_to_names)} ids")
+
+    def to_mentions(self, content: str) -> str:
+        """Replace configured names, with or without surrounding backticks, by their Discord mentions."""
+        if self.name_pattern is None:
+            return content
+        return self.name_pattern.sub(lambda match: self.names_to_ats.get(match.group(2).lower(), match.group(2)), content)
+
+    def to_names(self, content: str, bot_id: int | None = None, bot_name: str = "") -> str:
+        """Replace Discord mentions by configured names.
+
+        The first mention of the bot is dropped since it only addresses the message, later ones become the bot's name.
+        """
+        bot_mentions_seen = 0
+
+        def replace(match: re.Match) -> str:
+            nonlocal bot_mentions_seen
+            user_id = match.group(1)
+            if bot_id is not None and user_id == str(bot_id):
+                bot_mentions_seen += 1
+                return "" if bot_mentions_seen == 1 else f"{bot_name} "
+            return self.ids_to_names.get(user_id, match.group(0))
+
+        return DISCORD_MENTION_PATTERN.sub(replace, content)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from .fair_queue import FairQueue
+
+
+class MentionPriority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+
+
+@dataclass
+class ScheduledJob:
+    guild_id: int
+    run: Callable[[], Awaitable[Any]]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    done: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class MentionSchedulerService:
+    """Runs mention pipelines on a fixed pool of workers, fairly across guilds and by priority lane."""
+
+    def __init__(self, workers: int, max_queue_per_guild: int, max_queue_total: int):
+        self.worker_count = workers
+        self.queue: FairQueue[ScheduledJob] = FairQueue(lanes=len(MentionPriority), max_per_key=max_queue_per_guild, max_total=max_queue_total)
+        self.workers: list[asyncio.Task] = []
+        self.active = 0
+        self.stats = {"scheduled": 0, "shed": 0, "completed": 0, "failed": 0, "total_wait_seconds": 0.0}
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"Initialized MentionSchedulerService with {workers} workers (max_per_guild={max_queue_per_guild}, max_total={max_queue_total})")
+
+    def start(self):
+        if self.workers:
+            return
+        self.workers = [asyncio.create_task(self._worker(), name=f"mention-worker-{idx}") for idx in range(self.worker_count)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def schedule(self, guild_id: int | None, priority: MentionPriority, run: Callable[[], Awaitable[Any]]) -> asyncio.Future | None:
+        """Queue a job and return a future for its result, or None if the queue is full and the job was shed."""
+        job = ScheduledJob(guild_id=guild_id or 0, run=run)
+        if not self.queue.put_nowait(job.guild_id, job, lane=priority):
+            self.stats["shed"] += 1
+            self.logger.warning(f"Shedding mention for guild {job.guild_id}: queue depth {len(self.queue)}, shed so far {self.stats['shed']}")
+            return None
+
+        self.stats["scheduled"] += 1
+        self.logger.debug(f"Scheduled {priority.name} job for guild {job.guild_id}, queue depth {len(self.queue)}")
+        return job.done
+
+    def get_metrics(self) -> dict:
+        processed = self.stats["completed"] + self.stats["failed"]
+        return {
+            "queued": len(self.queue),
+            "queued_by_lane": {priority.name: depth for priority, depth in zip(MentionPriority, self.queue.lane_depths(), strict=True)},
+            "queued_by_guild": dict(self.queue.key_depths),
+            "active": self.active,
+            "workers": self.worker_count,
+            "scheduled": self.stats["scheduled"],
+            "shed": self.stats["shed"],
+            "completed": self.stats["completed"],
+            "failed": self.stats["failed"],
+            "avg_wait_seconds": self.stats["total_wait_seconds"] / processed if processed else 0.0,
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.stats["total_wait_seconds"] += time.monotonic() - job.enqueued_at
+            self.active += 1
+            try:
+                result = await job.run()
+                self.stats["completed"] += 1
+                if not job.done.done():
+                    job.done.set_result(result)
+            except Exception as e:
+                # The caller awaiting the future is responsible for reporting the error
+                self.stats["failed"] += 1
+                if not job.done.done():
+                    job.done.set_exception(e)
+            finally:
+                self.active -= 1
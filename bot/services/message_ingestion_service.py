@@ -0,0 +1,215 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+import discord
+from bson import Int64
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+class MessageIngestionService:
+    """Buffers message creates, edits and deletes and writes them to MongoDB in batches."""
+
+    def __init__(self, bot: "Juno"):
+        self.bot = bot
+        self.config = bot.config.messageIngestion
+        self.retention = bot.config.messageRetention
+        self.logger = logging.getLogger(__name__)
+        # None is the stop sentinel, the worker flushes the batch it holds and exits when it reads it
+        self.queue: asyncio.Queue[IngestionEvent | None] = asyncio.Queue(maxsize=self.config.maxQueueSize)
+        self.worker: asyncio.Task | None = None
+        self.stats = {"enqueued": 0, "dropped": 0, "flushed": 0, "failed": 0, "batches": 0}
+
+        if not self.config.enabled:
+            self.logger.info("Message ingestion is disabled")
+            return
+
+        self.logger.info(f"Initialized MessageIngestionService (batch_size={self.config.batchSize}, flush_interval={self.config.flushIntervalSeconds}s, max_queue={self.config.maxQueueSize}, bucketed={self.retention.bucketed})")
+
+    def start(self):
+        """Start the background flush worker."""
+        if not self.config.enabled or self.worker:
+            return
+        self.worker = asyncio.create_task(self._run(), name="message-ingestion")
+
+    async def stop(self):
+        """Stop the worker and flush whatever is still buffered."""
+        if not self.worker:
+            return
+
+        # Let the worker write the batch it already took off the queue instead of cancelling it mid-batch
+        if not self.worker.done():
+            await self.queue.put(None)
+        try:
+            await self.worker
+        except Exception as e:
+            self.logger.error(f"Message ingestion worker failed: {e}")
+        self.worker = None
+
+        remaining = []
+        while not self.queue.empty():
+            if (event := self.queue.get_nowait()) is not None:
+                remaining.append(event)
+
+        for start in range(0, len(remaining), self.config.batchSize):
+            await self._flush(remaining[start : start + self.config.batchSize])
+
+        self.logger.info(f"Stopped message ingestion, flushed {len(remaining)} pending operations. Stats: {self.stats}")
+
+    async def enqueue_message(self, message: discord.Message):
+        """Buffer a newly created guild message."""
+        if not message.guild:
+            return
+
+        document = {
+            "message_id": Int64(message.id),
+            "guild_id": Int64(message.guild.id),
+            "channel_id": Int64(message.channel.id),
+            "author_id": Int64(message.author.id),
+            "author_name": message.author.name,
+            "content": message.content,
+            "timestamp": message.created_at.astimezone(datetime.UTC).replace(tzinfo=None),
+            "deleted": False,
+        }
+        await self._enqueue(IngestionEvent("create", message.id, message.guild.id, message.channel.id, document))
+
+    async def enqueue_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Buffer a content edit for a message."""
+        content = payload.data.get("content")
+        if content is None or payload.guild_id is None:
+            return
+
+        edited_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        await self._enqueue(IngestionEvent("update", payload.message_id, payload.guild_id, payload.channel_id, {"content": content, "edited_at": edited_at}))
+
+    async def enqueue_delete(self, guild_id: int | None, channel_id: int, message_ids: set[int] | list[int]):
+        """Buffer tombstones for deleted messages."""
+        if guild_id is None:
+            return
+
+        deleted_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        for message_id in message_ids:
+            await self._enqueue(IngestionEvent("update", message_id, guild_id, channel_id, {"deleted": True, "deleted_at": deleted_at}))
+
+    async def _enqueue(self, event: "IngestionEvent"):
+        if not self.config.enabled:
+            return
+
+        try:
+            # Waiting on a full queue is the backpressure; give up after the timeout rather than stalling the gateway
+            await asyncio.wait_for(self.queue.put(event), timeout=self.config.enqueueTimeoutSeconds)
+            self.stats["enqueued"] += 1
+        except TimeoutError:
+            self.stats["dropped"] += 1
+            self.logger.warning(f"Message ingestion queue is full ({self.queue.qsize()}/{self.config.maxQueueSize}), dropped an operation. Total dropped: {self.stats['dropped']}")
+
+    async def _run(self):
+        while True:
+            batch, stopping = await self._next_batch()
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _next_batch(self) -> tuple[list["IngestionEvent"], bool]:
+        """Wait for the first operation, then gather until the batch is full or the flush interval elapses.
+
+        Returns the batch and whether the stop sentinel was read.
+        """
+        loop = asyncio.get_running_loop()
+        first = await self.queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = loop.time() + self.config.flushIntervalSeconds
+
+        while len(batch) < self.config.batchSize:
+            try:
+                event = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except TimeoutError:
+                    break
+
+            if event is None:
+                return batch, True
+            batch.append(event)
+
+        return batch, False
+
+    def _build_operations(self, batch: list["IngestionEvent"]) -> list[tuple[Collection, list[UpdateOne]]]:
+        """Translate buffered events into write operations for every collection they touch."""
+        messages_service = self.bot.discord_messages_service
+        flat_operations = []
+        bucket_operations = []
+
+        for event in batch:
+            message_filter = {"message_id": Int64(event.message_id)}
+            if event.kind == "create":
+                # Upsert keeps the write idempotent if the same message is delivered twice
+                flat_operations.append(UpdateOne(message_filter, {"$setOnInsert": event.fields}, upsert=True))
+            else:
+                flat_operations.append(UpdateOne(message_filter, {"$set": event.fields}))
+
+            if not self.retention.bucketed:
+                continue
+
+            timestamp = discord.utils.snowflake_time(event.message_id).astimezone(datetime.UTC).replace(tzinfo=None)
+            bucket_start = messages_service.get_bucket_start(timestamp)
+            bucket_filter = {"guild_id": Int64(event.guild_id), "channel_id": Int64(event.channel_id), "bucket_start": bucket_start}
+            if event.kind == "create":
+                # Both steps are idempotent, so a retried batch or a replayed create neither duplicates nor double counts the message
+                bucket_end = bucket_start + datetime.timedelta(minutes=self.retention.bucketMinutes)
+                bucket_operations.append(UpdateOne(bucket_filter, {"$setOnInsert": {"bucket_end": bucket_end, "messages": [], "count": 0}}, upsert=True))
+                bucket_operations.append(UpdateOne({**bucket_filter, "messages.message_id": {"$ne": Int64(event.message_id)}}, {"$push": {"messages": event.fields}, "$inc": {"count": 1}}))
+            else:
+                update = {"$set": {f"messages.$[m].{key}": value for key, value in event.fields.items()}}
+                bucket_operations.append(UpdateOne(bucket_filter, update, array_filters=[{"m.message_id": Int64(event.message_id)}]))
+
+        targets = []
+        if self.retention.bucketed:
+            targets.append((messages_service.buckets_collection, bucket_operations))
+        else:
+            targets.append((messages_service.messages_collection, flat_operations))
+        if messages_service.archive_collection is not None:
+            targets.append((messages_service.archive_collection, flat_operations))
+        return targets
+
+    async def _flush(self, batch: list["IngestionEvent"]):
+        if not batch:
+            return
+
+        failed = False
+        for collection, operations in self._build_operations(batch):
+            try:
+                # Ordered so an edit or delete is never applied ahead of the insert it targets
+                result = await asyncio.to_thread(collection.bulk_write, operations, ordered=True)
+                self.logger.debug(f"Flushed {len(operations)} operations to {collection.name} (upserted={result.upserted_count}, modified={result.modified_count})")
+            except BulkWriteError as e:
+                failed = True
+                self.logger.error(f"Bulk write of {len(operations)} operations to {collection.name} partially failed: {e.details.get('writeErrors', [])[:1]}")
+            except PyMongoError as e:
+                failed = True
+                self.logger.error(f"Failed to flush {len(operations)} operations to {collection.name}: {e}")
+
+        self.stats["failed" if failed else "flushed"] += len(batch)
+        self.stats["batches"] += 1
+
+
+@dataclass(slots=True)
+class IngestionEvent:
+    kind: Literal["create", "update"]
+    message_id: int
+    guild_id: int
+    channel_id: int
+    fields: dict[str, Any]
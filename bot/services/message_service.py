@@ -1,8 +1,9 @@
+import asyncio
 import base64
+import datetime
 import logging
 from typing import TYPE_CHECKING
 
-import aiohttp
 import discord
 
 from bot.services import Message
@@ -10,6 +11,8 @@ from bot.services import Message
 if TYPE_CHECKING:
     from bot.juno import Juno
 
+    from .mention_coalescing_service import PendingMention
+
 
 class MessageService:
     def __init__(self, bot: "Juno", prompts: dict, ids_to_users: dict):
@@ -39,18 +42,18 @@ class MessageService:
 
     async def process_message_images(self, message: discord.Message) -> list[dict]:
         """Process and encode image attachments."""
+        attachments = [att for att in message.attachments if att.content_type and att.content_type.startswith("image/")]
+        if not attachments:
+            return []
+
         images = []
-        for attachment in message.attachments:
-            if attachment.content_type and attachment.content_type.startswith("image/"):
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(attachment.url) as resp:
-                            if resp.status == 200:
-                                img_bytes = await resp.read()
-                                img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-                                images.append({"type": attachment.content_type, "data": img_b64})
-                except Exception as e:
-                    self.logger.error(f"Failed to process image attachment: {e}")
+        downloads = await self.bot.attachment_download_service.fetch_attachments(attachments)
+        for attachment, img_bytes in zip(attachments, downloads, strict=True):
+            if img_bytes is None:
+                self.logger.error(f"Failed to process image attachment: {attachment.filename}")
+                continue
+            img_b64 = base64.b64encode(img_bytes).decode("utf-8")
+            images.append({"type": attachment.content_type, "data": img_b64})
         return images
 
     async def build_message_context(self, message: discord.Message, reference_message: discord.Message | None, username: str) -> list[Message]:
@@ -59,11 +62,63 @@ class MessageService:
         messages = []
 
         # Add enhanced system prompt
-        if main_prompt := self.prompts.get("main"):
-            main_prompt = main_prompt.replace("{{BOTNAME}}", self.bot.user.name)
+        if system_message := self._build_system_message():
+            messages.append(system_message)
+
+        # Get historical messages and format as transcript
+        if transcript_message := self._build_transcript_message(message):
+            messages.append(transcript_message)
+
+        # Add reference message context if replying
+        if reference_message:
+            messages.append(Message(role="user", content=self._format_reply_context(reference_message)))
+
+        # Add current message
+        current_content = f"\nCURRENT MESSAGE:\n[{username}]: " + self.replace_mentions(message.content).strip()
+        messages.append(Message(role="user", content=current_content, images=images))
+
+        return messages
+
+    async def build_batched_message_context(self, mentions: list["PendingMention"]) -> list[Message]:
+        """Build one context that asks for a separate reply to each of several coalesced mentions."""
+        all_images = await asyncio.gather(*(self.process_message_images(mention.message) for mention in mentions))
+        messages = []
+
+        if system_message := self._build_system_message():
+            messages.append(system_message)
+
+        batch_ids = {mention.message.id for mention in mentions}
+        if transcript_message := self._build_transcript_message(mentions[0].message, exclude_ids=batch_ids):
+            messages.append(transcript_message)
+
+        messages.append(
+            Message(
+                role="user",
+                content=f"""
+SEVERAL USERS MENTIONED YOU AT ONCE:
+- Below are {len(mentions)} numbered messages, each from a user waiting on your reply
+- Write a separate reply for every message, addressed to that user
+- Return one reply per message, using the message number as mention_index""",
+            )
+        )
+
+        for idx, (mention, images) in enumerate(zip(mentions, all_images, strict=True)):
+            content = f"\nCURRENT MESSAGE {idx}:"
+            if mention.reference_message:
+                content += self._format_reply_context(mention.reference_message)
+            content += f"\n[{mention.user}]: " + self.replace_mentions(mention.message.content).strip()
+            messages.append(Message(role="user", content=content, images=images))
+
+        return messages
 
-            # Add multi-user context instructions
-            multi_user_prompt = f"""
+    def _build_system_message(self) -> Message | None:
+        if not (main_prompt := self.prompts.get("main")):
+            return None
+
+        main_prompt = main_prompt.replace("{{BOTNAME}}", self.bot.user.name)
+
+        # Add multi-user context instructions
+        multi_user_prompt = f"""
     {main_prompt}
 
     MULTI-USER CHAT CONTEXT:
@@ -73,60 +128,57 @@ class MessageService:
     - Pay close attention to the username before each message
     - When responding, you may address specific users by name if appropriate
     """
-            messages.append(Message(role="system", content=multi_user_prompt))
-
-        # Get historical messages and format as transcript
-        historical_msgs = self.bot.discord_messages_service.get_last_n_messages_within_n_minutes(message=message, n=10, minutes=30)
-
-        if historical_msgs:
-            transcript_lines = []
-            for msg in historical_msgs:
-                author_name = self.ids_to_users.get(str(msg["author_id"]), msg["author_name"])
-                content = self.replace_mentions(msg["content"]).strip()
-
-                # Mark bot's own messages clearly
-                if msg["author_id"] == self.bot.user.id:
-                    transcript_lines.append(f"[{self.bot.user.name}]: {content}")
-                else:
-                    transcript_lines.append(f"[{author_name}]: {content}")
+        return Message(role="system", content=multi_user_prompt)
+
+    def _build_transcript_message(self, message: discord.Message, exclude_ids: set[int] | None = None) -> Message | None:
+        # With a rolling summary only what it hasn't folded in yet is needed raw, the summary carries the rest
+        summary = self.bot.conversation_summary_service.get_summary(message.channel.id)
+        summarized_until = self.bot.conversation_summary_service.get_summarized_until(message.channel.id)
+        if summary and summarized_until:
+            summary_config = self.bot.config.conversationSummary
+            # Mongo dates have millisecond precision, step past the last summarized message
+            since = summarized_until + datetime.timedelta(milliseconds=1)
+            historical_msgs = self.bot.discord_messages_service.find_messages(message.guild.id, message.channel.id, since, summary_config.messagesPerUpdate + summary_config.rawMessages, exclude_message_id=message.id, newest=True)
+        elif summary:
+            historical_msgs = self.bot.discord_messages_service.get_recent_messages(message=message, n=self.bot.config.conversationSummary.rawMessages, minutes=30)
+        else:
+            historical_msgs = self.bot.discord_messages_service.get_last_n_messages_within_n_minutes(message=message, n=10, minutes=30)
+
+        if exclude_ids:
+            historical_msgs = [msg for msg in historical_msgs if msg["message_id"] not in exclude_ids]
+
+        if not historical_msgs and not summary:
+            return None
 
-            # Add all historical messages as a single user message
-            transcript = "RECENT CONVERSATION:\n" + "\n".join(transcript_lines)
-            messages.append(Message(role="user", content=transcript))
+        transcript_lines = []
+        for msg in historical_msgs:
+            author_name = self.ids_to_users.get(str(msg["author_id"]), msg["author_name"])
+            content = self.replace_mentions(msg["content"]).strip()
 
-        # Add reference message context if replying
-        if reference_message:
-            ref_username = self.ids_to_users.get(str(reference_message.author.id), reference_message.author.name)
-            ref_content = self.replace_mentions(reference_message.content).strip()
+            # Mark bot's own messages clearly
+            if msg["author_id"] == self.bot.user.id:
+                transcript_lines.append(f"[{self.bot.user.name}]: {content}")
+            else:
+                transcript_lines.append(f"[{author_name}]: {content}")
 
-            # Format as part of the conversation flow
-            reply_context = f"\nREPLYING TO:\n[{ref_username}]: {ref_content}"
-            messages.append(Message(role="user", content=reply_context))
+        # Add all historical messages as a single user message
+        transcript = "RECENT CONVERSATION:\n" + "\n".join(transcript_lines)
+        if summary:
+            transcript = f"CONVERSATION SUMMARY:\n{summary}\n\n{transcript}"
+        return Message(role="user", content=transcript)
 
-        # Add current message
-        current_content = f"\nCURRENT MESSAGE:\n[{username}]: " + self.replace_mentions(message.content).strip()
-        messages.append(Message(role="user", content=current_content, images=images))
+    def _format_reply_context(self, reference_message: discord.Message) -> str:
+        ref_username = self.ids_to_users.get(str(reference_message.author.id), reference_message.author.name)
+        ref_content = self.replace_mentions(reference_message.content).strip()
 
-        return messages
+        # Format as part of the conversation flow
+        return f"\nREPLYING TO:\n[{ref_username}]: {ref_content}"
 
     def replace_mentions(self, text: str) -> str:
-        """Replace bot mentions with empty string or 'Juno'."""
+        """Replace bot mentions with empty string or 'Juno', and other user mentions with their names."""
         if not self.bot.user:
             return text
-
-        mention = f"<@{self.bot.user.id}>"
-        parts = text.split(mention)
-        if len(parts) <= 1:
-            return text
-
-        result = parts[0]
-        for i, part in enumerate(parts[1:]):
-            if i == 0:
-                result += "" + part
-            else:
-                result += self.bot.user.name + " " + part
-
-        return result
+        return self.bot.mention_rewriter.to_names(text, self.bot.user.id, self.bot.user.name)
 
     def get_image_attachment(self, message: discord.Message, reference_message: discord.Message | None = None) -> discord.Attachment | None:
         """Get image attachment from message or referenced message.
@@ -1,18 +1,33 @@
 import logging
+import time as monotonic_time
 from datetime import datetime, time, timedelta
 from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-import discord
 import pymongo
 from bson import Int64
 
+from .rate_limit_service import ExpiringDict
+
 if TYPE_CHECKING:
     from bot.juno import Juno
 
 
 class MongoImageLimitService:
-    """Service for managing daily image generation limits in MongoDB."""
+    """Service for managing daily image generation limits in MongoDB.
+
+    Usage lives in one counter document per (guild, user, Central-time day, reset generation) that a TTL index
+    drops once the day is over, so a new day needs no reset at all. Limits live in separate documents: a guild
+    default (user_id null) and per-user overrides, resolved user -> guild -> config default. Resetting a whole
+    guild bumps its generation, which starts every user on a fresh counter with one write.
+
+    Only user documents flagged as an override count. Older per-user documents carry a copy of the limit that
+    was in force when they were written and must not shadow the guild default.
+    """
+
+    # Keep finished days around briefly for debugging before the TTL monitor removes them
+    USAGE_RETENTION = timedelta(days=1)
+    LIMIT_CACHE_SECONDS = 300
 
     def __init__(self, bot: "Juno", max_daily_images: int):
         self.bot = bot
@@ -20,7 +35,9 @@ class MongoImageLimitService:
         self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
         self.db = self.mongo_client[self.bot.config.mongoDbName]
         self.collection = self.db[self.bot.config.mongoImageLimitsCollectionName]
+        self.usage_collection = self.db[self.bot.config.mongoImageUsageCollectionName]
         self.timezone = ZoneInfo("America/Chicago")  # Central Time
+        self.limit_cache = ExpiringDict(self.LIMIT_CACHE_SECONDS, 10000)
         self.logger = logging.getLogger(__name__)
 
         # Initialize collection with indexes
@@ -28,112 +45,119 @@ class MongoImageLimitService:
         self.logger.info(f"Initialized MongoImageLimitService with default daily limit of {self.default_max_daily_images} images")
 
     def _ensure_indexes(self):
-        """Create indexes on the collection for faster retrieval."""
+        """Create indexes on the collections for faster retrieval."""
         try:
-            # Create compound index on guild_id and user_id for fast lookups
+            # One limit document per guild default (user_id null) and per user override
             self.collection.create_index([("guild_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)], unique=True)
-            # Create index on reset_time for potential cleanup queries
-            self.collection.create_index([("reset_time", pymongo.ASCENDING)])
-            self.logger.info("Created indexes on image_limits collection")
+            # One counter per user per day and reset generation, the unique key is what turns a full counter into a rejected upsert
+            self.usage_collection.create_index([("guild_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING), ("day", pymongo.ASCENDING), ("generation", pymongo.ASCENDING)], unique=True)
+            self.usage_collection.create_index([("expires_at", pymongo.ASCENDING)], expireAfterSeconds=0)
+            self.logger.info("Created indexes on image limit collections")
         except pymongo.errors.OperationFailure as e:
             self.logger.warning(f"Could not create indexes: {e}")
 
     def _get_next_reset_time(self) -> datetime:
         """Get the next midnight Central time."""
         now = datetime.now(self.timezone)
+        return datetime.combine(now.date() + timedelta(days=1), time(0, 0, 0), tzinfo=self.timezone)
 
-        # Get today's midnight
-        today_midnight = datetime.combine(now.date(), time(0, 0, 0), tzinfo=self.timezone)
+    def _get_day(self) -> str:
+        """Get today's Central-time date, which keys the usage counters."""
+        return datetime.now(self.timezone).date().isoformat()
 
-        # If we're past midnight today, get tomorrow's midnight
-        if now >= today_midnight:
-            next_midnight = today_midnight + timedelta(days=1)
-        else:
-            next_midnight = today_midnight
+    def _resolve_limit(self, user_id: int, guild_id: int) -> tuple[int, int]:
+        """Resolve a user's daily limit and their guild's reset generation. Returns (limit, generation)."""
+        now = monotonic_time.monotonic()
+        cache_key = (guild_id, user_id)
+        if (cached := self.limit_cache.get(cache_key, now)) is not None:
+            return cached
 
-        return next_midnight
+        docs = {doc.get("user_id"): doc for doc in self.collection.find({"guild_id": Int64(guild_id), "user_id": {"$in": [Int64(user_id), None]}})}
+        guild_doc = docs.get(None, {})
+        user_doc = docs.get(user_id, {})
 
-    def can_generate_image(self, user: discord.User, guild: discord.Guild) -> tuple[bool, str]:
-        """Check if user can generate an image. Returns (can_generate, message).
+        limit = guild_doc.get("max_daily_images", self.default_max_daily_images)
+        if user_doc.get("override"):
+            limit = user_doc.get("max_daily_images", limit)
+        resolved = (limit, guild_doc.get("generation", 0))
+        self.limit_cache.set(cache_key, resolved, now)
+        return resolved
+
+    def _invalidate_guild(self, guild_id: int):
+        for cache_key in [key for key in self.limit_cache.entries if key[0] == guild_id]:
+            self.limit_cache.pop(cache_key)
+
+    def _usage_key(self, user_id: int, guild_id: int, generation: int) -> dict:
+        return {"guild_id": Int64(guild_id), "user_id": Int64(user_id), "day": self._get_day(), "generation": generation}
+
+    def reserve(self, user_id: int, guild_id: int) -> tuple[dict | None, str]:
+        """Atomically check the limit and reserve one image in a single round trip. Returns (reservation, message).
+
+        A reservation counts against the limit straight away, so parallel requests cannot overshoot it.
+        Call commit once the image was delivered, or release with the returned reservation if generation failed.
 
         Args:
-            user: The Discord user requesting image generation
-            guild: The Discord guild where the request was made
+            user_id: The Discord user ID
+            guild_id: The Discord guild ID
 
         Returns:
-            Tuple of (can_generate: bool, error_message: str)
+            Tuple of (reservation: the usage key the image was counted under, or None if the limit is reached, error_message: str)
         """
-        now = datetime.now(self.timezone)
+        limit, generation = self._resolve_limit(user_id, guild_id)
+        usage_key = self._usage_key(user_id, guild_id, generation)
 
-        # Get or initialize user usage
-        user_data = self.collection.find_one({"guild_id": Int64(guild.id), "user_id": Int64(user.id)})
-
-        if not user_data:
-            # Initialize new user with default limit from config
-            next_reset = self._get_next_reset_time()
-            self.collection.insert_one(
-                {
-                    "guild_id": Int64(guild.id),
-                    "user_id": Int64(user.id),
-                    "count": 0,
-                    "max_daily_images": self.default_max_daily_images,
-                    "reset_time": next_reset,
-                }
-            )
-            self.logger.info(f"Initialized image limit tracking for {user.name} in guild {guild.name} with limit {self.default_max_daily_images}")
-            return True, ""
-
-        # Parse reset time
-        reset_time = user_data["reset_time"]
-        if isinstance(reset_time, str):
-            reset_time = datetime.fromisoformat(reset_time)
-
-        # Ensure reset_time is timezone-aware
-        if reset_time.tzinfo is None:
-            reset_time = reset_time.replace(tzinfo=self.timezone)
-
-        # Reset if past reset time
-        if now >= reset_time:
-            next_reset = self._get_next_reset_time()
-            self.collection.update_one(
-                {"guild_id": Int64(guild.id), "user_id": Int64(user.id)},
-                {"$set": {"count": 0, "reset_time": next_reset}},
+        try:
+            usage = self.usage_collection.find_one_and_update(
+                # A full counter misses the filter and the upsert then collides with the unique index
+                {**usage_key, "count": {"$lt": limit}},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": self._get_next_reset_time() + self.USAGE_RETENTION}},
+                upsert=True,
+                return_document=pymongo.ReturnDocument.AFTER,
             )
-            self.logger.info(f"Reset daily image count for {user.name} in guild {guild.name}")
-            return True, ""
+        except pymongo.errors.DuplicateKeyError:
+            return None, self._get_limit_message(limit)
+
+        self.logger.info(f"[RESERVE IMAGE] - user {user_id} in guild {guild_id} reserved {usage['count']}/{limit} images today")
+        return usage_key, ""
 
-        # Check limit (use per-user limit from DB, or default if not set)
-        count = user_data.get("count", 0)
-        user_limit = user_data.get("max_daily_images", self.default_max_daily_images)
-        self.logger.info(f"[CAN GENERATE IMAGE] - {user.name} has generated {count}/{user_limit} images today")
+    def commit(self, user_id: int, guild_id: int):
+        """Confirm a reservation once the image was delivered. The reservation already counted it, so no write is needed.
 
-        if count >= user_limit:
-            time_until_reset = reset_time - now
-            hours = int(time_until_reset.total_seconds() // 3600)
-            minutes = int((time_until_reset.total_seconds() % 3600) // 60)
-            return False, f"Daily image limit reached ({user_limit} images). Resets in {hours}h {minutes}m. Use the `/image_stats` command to check your usage."
+        Args:
+            user_id: The Discord user ID
+            guild_id: The Discord guild ID
+        """
+        self.logger.info(f"Committed image reservation for user {user_id} in guild {guild_id}")
 
-        return True, ""
+    def release(self, user_id: int, guild_id: int, reservation: dict | None = None):
+        """Give back a reservation whose image was never delivered.
 
-    def increment_usage(self, user_id: int, guild_id: int):
-        """Increment the user's daily image count.
+        The counter it was taken from is decremented even if the day has rolled over or the guild was reset since,
+        so a late failure never refunds an image against the new counter.
 
         Args:
             user_id: The Discord user ID
             guild_id: The Discord guild ID
+            reservation: The usage key returned by reserve, today's counter if not given
         """
-        result = self.collection.update_one(
-            {"guild_id": Int64(guild_id), "user_id": Int64(user_id)},
-            {"$inc": {"count": 1}},
+        if reservation is None:
+            _, generation = self._resolve_limit(user_id, guild_id)
+            reservation = self._usage_key(user_id, guild_id, generation)
+        result = self.usage_collection.update_one(
+            {**reservation, "count": {"$gt": 0}},
+            {"$inc": {"count": -1}},
         )
 
         if result.modified_count > 0:
-            # Get updated count for logging
-            user_data = self.collection.find_one({"guild_id": Int64(guild_id), "user_id": Int64(user_id)})
-            count = user_data.get("count", 0) if user_data else 0
-            self.logger.info(f"Incremented image count for user {user_id} in guild {guild_id} to {count}")
+            self.logger.info(f"Released image reservation for user {user_id} in guild {guild_id}")
         else:
-            self.logger.warning(f"Failed to increment image count for user {user_id} in guild {guild_id}")
+            self.logger.warning(f"No image reservation to release for user {user_id} in guild {guild_id}")
+
+    def _get_limit_message(self, limit: int) -> str:
+        time_until_reset = self._get_next_reset_time() - datetime.now(self.timezone)
+        hours = int(time_until_reset.total_seconds() // 3600)
+        minutes = int((time_until_reset.total_seconds() % 3600) // 60)
+        return f"Daily image limit reached ({limit} images). Resets in {hours}h {minutes}m. Use the `/image_stats` command to check your usage."
 
     def get_remaining_images(self, user_id: int, guild_id: int) -> int:
         """Get the number of remaining images for a user.
@@ -145,14 +169,7 @@ class MongoImageLimitService:
         Returns:
             Number of remaining images the user can generate today
         """
-        user_data = self.collection.find_one({"guild_id": Int64(guild_id), "user_id": Int64(user_id)})
-
-        if not user_data:
-            return self.default_max_daily_images
-
-        count = user_data.get("count", 0)
-        user_limit = user_data.get("max_daily_images", self.default_max_daily_images)
-        return max(0, user_limit - count)
+        return self.get_user_stats(user_id, guild_id)["remaining"]
 
     def get_user_stats(self, user_id: int, guild_id: int) -> dict:
         """Get detailed stats for a user.
@@ -164,23 +181,14 @@ class MongoImageLimitService:
         Returns:
             Dictionary with user stats including count, remaining, max_daily_images, and reset_time
         """
-        user_data = self.collection.find_one({"guild_id": Int64(guild_id), "user_id": Int64(user_id)})
-
-        if not user_data:
-            return {
-                "count": 0,
-                "remaining": self.default_max_daily_images,
-                "max_daily_images": self.default_max_daily_images,
-                "reset_time": self._get_next_reset_time(),
-            }
-
-        count = user_data.get("count", 0)
-        user_limit = user_data.get("max_daily_images", self.default_max_daily_images)
+        limit, generation = self._resolve_limit(user_id, guild_id)
+        usage = self.usage_collection.find_one(self._usage_key(user_id, guild_id, generation)) or {}
+        count = usage.get("count", 0)
         return {
             "count": count,
-            "remaining": max(0, user_limit - count),
-            "max_daily_images": user_limit,
-            "reset_time": user_data.get("reset_time"),
+            "remaining": max(0, limit - count),
+            "max_daily_images": limit,
+            "reset_time": self._get_next_reset_time(),
         }
 
     def reset_user(self, user_id: int, guild_id: int):
@@ -190,38 +198,26 @@ class MongoImageLimitService:
             user_id: The Discord user ID
             guild_id: The Discord guild ID
         """
-        next_reset = self._get_next_reset_time()
-        result = self.collection.update_one(
-            {"guild_id": Int64(guild_id), "user_id": Int64(user_id)},
-            {"$set": {"count": 0, "reset_time": next_reset}},
-            upsert=True,
-        )
+        _, generation = self._resolve_limit(user_id, guild_id)
+        result = self.usage_collection.delete_one(self._usage_key(user_id, guild_id, generation))
 
-        if result.modified_count > 0 or result.upserted_id:
+        if result.deleted_count > 0:
             self.logger.info(f"Reset image count for user {user_id} in guild {guild_id}")
         else:
-            self.logger.warning(f"No changes made when resetting user {user_id} in guild {guild_id}")
+            self.logger.info(f"User {user_id} in guild {guild_id} has not generated any images today, nothing to reset")
 
-    def reset_all_users(self, guild_id: int) -> int:
-        """Reset all users' daily image counts in a guild.
+    def reset_all_users(self, guild_id: int):
+        """Reset all users' daily image counts in a guild by starting a new counter generation.
 
         Args:
             guild_id: The Discord guild ID
-
-        Returns:
-            Number of users reset
         """
-        next_reset = self._get_next_reset_time()
-        result = self.collection.update_many(
-            {"guild_id": Int64(guild_id)},
-            {"$set": {"count": 0, "reset_time": next_reset}},
-        )
-
-        self.logger.info(f"Reset image counts for {result.modified_count} users in guild {guild_id}")
-        return result.modified_count
+        self.collection.update_one({"guild_id": Int64(guild_id), "user_id": None}, {"$inc": {"generation": 1}}, upsert=True)
+        self._invalidate_guild(guild_id)
+        self.logger.info(f"Reset image counts for all users in guild {guild_id}")
 
     def set_user_limit(self, user_id: int, guild_id: int, new_limit: int) -> bool:
-        """Set the daily image limit for a specific user.
+        """Set the daily image limit override for a specific user.
 
         Args:
             user_id: The Discord user ID
@@ -233,34 +229,28 @@ class MongoImageLimitService:
         """
         result = self.collection.update_one(
             {"guild_id": Int64(guild_id), "user_id": Int64(user_id)},
-            {"$set": {"max_daily_images": new_limit}},
+            {"$set": {"max_daily_images": new_limit, "override": True}},
             upsert=True,
         )
+        self.limit_cache.pop((guild_id, user_id))
 
-        if result.modified_count > 0 or result.upserted_id:
+        if result.matched_count > 0 or result.upserted_id:
             self.logger.info(f"Set image limit to {new_limit} for user {user_id} in guild {guild_id}")
             return True
         else:
             self.logger.warning(f"Failed to set image limit for user {user_id} in guild {guild_id}")
             return False
 
-    def set_guild_limit(self, guild_id: int, new_limit: int) -> int:
-        """Set the daily image limit for all users in a guild.
+    def set_guild_limit(self, guild_id: int, new_limit: int):
+        """Set the default daily image limit for users in a guild without their own override.
 
         Args:
             guild_id: The Discord guild ID
-            new_limit: The new maximum daily image limit for all users
-
-        Returns:
-            Number of users updated
+            new_limit: The new default maximum daily image limit
         """
-        result = self.collection.update_many(
-            {"guild_id": Int64(guild_id)},
-            {"$set": {"max_daily_images": new_limit}},
-        )
-
-        self.logger.info(f"Updated image limit to {new_limit} for {result.modified_count} users in guild {guild_id}")
-        return result.modified_count
+        self.collection.update_one({"guild_id": Int64(guild_id), "user_id": None}, {"$set": {"max_daily_images": new_limit}}, upsert=True)
+        self._invalidate_guild(guild_id)
+        self.logger.info(f"Set default image limit to {new_limit} in guild {guild_id}")
 
     def get_user_limit(self, user_id: int, guild_id: int) -> int:
         """Get the daily image limit for a specific user.
@@ -272,9 +262,5 @@ class MongoImageLimitService:
         Returns:
             The user's daily image limit
         """
-        user_data = self.collection.find_one({"guild_id": Int64(guild_id), "user_id": Int64(user_id)})
-
-        if not user_data:
-            return self.default_max_daily_images
-
-        return user_data.get("max_daily_images", self.default_max_daily_images)
+        limit, _ = self._resolve_limit(user_id, guild_id)
+        return limit
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from .types import AudioMetaData
+
+if TYPE_CHECKING:
+    from bot.services.config_service import MusicConfig
+
+
+class AudioFileCache:
+    """Bounded on-disk copy of recently played songs, so seeks and filter changes read a local file.
+
+    Songs are downloaded in the background while they play and evicted least recently used first across all
+    guilds, except for the songs a guild has pinned because it is playing them or about to.
+    """
+
+    # Download in ranges like yt-dlp does, googlevideo throttles single long-running requests
+    RANGE_SIZE = 10 * 1024 * 1024
+
+    def __init__(self, config: "MusicConfig"):
+        self.config = config
+        self.path = os.path.abspath(config.fileCachePath) if config.fileCachePath else ""
+        self.session: aiohttp.ClientSession | None = None
+        self.semaphore = asyncio.Semaphore(config.fileCacheDownloads)
+        self.downloads: dict[str, asyncio.Task] = {}
+        self.index: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes = 0
+        self.pins: dict[int, set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "downloads": 0, "failures": 0, "evictions": 0}
+        self.logger = logging.getLogger(__name__)
+
+        if self.path:
+            self._load_index()
+        self.logger.info(f"Initialized AudioFileCache (path={self.path or 'disabled'}, max_bytes={config.fileCacheBytes})")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _load_index(self):
+        """Rebuild the LRU from whatever survived the last run, oldest first, and drop partial downloads."""
+        os.makedirs(self.path, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self.index[name] = size
+            self.total_bytes += size
+
+        self._evict()
+        self.logger.info(f"Loaded {len(self.index)} cached songs ({self.total_bytes} bytes) from {self.path}")
+
+    async def close(self):
+        for task in self.downloads.values():
+            task.cancel()
+        await asyncio.gather(*self.downloads.values(), return_exceptions=True)
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    @staticmethod
+    def get_key(song: AudioMetaData) -> str:
+        return hashlib.sha256((song.webpage_url or song.url).encode()).hexdigest()
+
+    def get_path(self, song: AudioMetaData) -> str | None:
+        """Path of the song's local copy, or None if it is not fully downloaded."""
+        if not self.enabled:
+            return None
+
+        key = self.get_key(song)
+        if key not in self.index:
+            self.stats["misses"] += 1
+            return None
+
+        self.index.move_to_end(key)
+        self.stats["hits"] += 1
+        return os.path.join(self.path, key)
+
+    def pin(self, guild_id: int, songs: list[AudioMetaData]):
+        """Protect a guild's current and upcoming songs from eviction, replacing what it pinned before."""
+        if songs:
+            self.pins[guild_id] = {self.get_key(song) for song in songs}
+        else:
+            self.pins.pop(guild_id, None)
+
+    def prefetch(self, song: AudioMetaData):
+        """Start downloading the song in the background unless it is cached, already downloading or a live stream."""
+        if not self.enabled or not song.url or not song.duration:
+            return
+        key = self.get_key(song)
+        if key in self.index or key in self.downloads:
+            return
+        self.downloads[key] = asyncio.create_task(self._download(key, song))
+
+    def get_metrics(self) -> dict:
+        return {"files": len(self.index), "bytes": self.total_bytes, "downloading": len(self.downloads), "pinned": sum(len(keys) for keys in self.pins.values()), **self.stats}
+
+    async def _download(self, key: str, song: AudioMetaData):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(sock_read=30))
+
+        part_path = os.path.join(self.path, f"{key}.part")
+        size = 0
+        try:
+            async with self.semaphore:
+                await asyncio.to_thread(self._write_file, part_path, b"")
+                while True:
+                    async with self.session.get(song.url, headers={"Range": f"bytes={size}-{size + self.RANGE_SIZE - 1}"}) as resp:
+                        if resp.status == 416 and size > 0:
+                            # The previous range ended exactly at the end of the file
+                            break
+                        if resp.status not in (200, 206):
+                            raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                        data = await resp.read()
+                        total = self._get_total_size(resp.headers.get("Content-Range"))
+
+                    size += len(data)
+                    if size > self.config.fileCacheMaxTrackBytes:
+                        self.logger.info(f"Not caching '{song.title}', it is larger than {self.config.fileCacheMaxTrackBytes} bytes")
+                        return
+                    await asyncio.to_thread(self._append_file, part_path, data)
+                    if resp.status == 200 or len(data) < self.RANGE_SIZE or (total is not None and size >= total):
+                        break
+
+            await asyncio.to_thread(os.replace, part_path, os.path.join(self.path, key))
+            self.index[key] = size
+            self.total_bytes += size
+            self.stats["downloads"] += 1
+            self._evict()
+            self.logger.info(f"Cached '{song.title}' locally ({size} bytes)")
+        except (TimeoutError, aiohttp.ClientError, OSError) as e:
+            self.stats["failures"] += 1
+            self.logger.warning(f"Could not cache '{song.title}' locally: {e}")
+        finally:
+            self.downloads.pop(key, None)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def _evict(self):
+        pinned = set().union(*self.pins.values())
+        for key in list(self.index):
+            if self.total_bytes <= self.config.fileCacheBytes:
+                break
+            if key in pinned:
+                continue
+            self.total_bytes -= self.index.pop(key)
+            self.stats["evictions"] += 1
+            try:
+                # FFmpeg processes still reading the file keep it open until they exit
+                os.remove(os.path.join(self.path, key))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _get_total_size(content_range: str | None) -> int | None:
+        """Total file size from a Content-Range header like "bytes 0-1023/4096", None if the server didn't say."""
+        if not content_range or "/" not in content_range:
+            return None
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+
+    @staticmethod
+    def _append_file(path: str, data: bytes):
+        with open(path, "ab") as f:
+            f.write(data)
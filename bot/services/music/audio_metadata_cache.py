@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlparse
+
+import pymongo
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+
+@dataclass
+class CachedTrack:
+    """Stable track metadata plus the short-lived stream URL it was last resolved to."""
+
+    metadata: dict[str, Any]
+    stream_url: str | None = None
+    stream_expires_at: float = 0.0
+
+    def has_fresh_stream(self, now: float) -> bool:
+        return bool(self.stream_url) and self.stream_expires_at > now
+
+
+class AudioMetadataCache:
+    """Maps normalized queries and webpage URLs to track metadata, LRU in memory and optionally persisted to MongoDB.
+
+    Metadata is stable and kept for days, the stream URL is stored beside it with its own expiry so a stale
+    stream only costs a re-resolve of that one URL instead of a new search.
+    """
+
+    def __init__(self, bot: "Juno", max_entries: int, persist: bool, ttl_days: int, stream_ttl_seconds: int, stream_expiry_margin_seconds: int):
+        self.bot = bot
+        self.max_entries = max_entries
+        self.stream_ttl_seconds = stream_ttl_seconds
+        self.stream_expiry_margin_seconds = stream_expiry_margin_seconds
+        self.tracks: OrderedDict[str, CachedTrack] = OrderedDict()
+        self.queries: OrderedDict[str, str] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stale_streams": 0}
+        self.logger = logging.getLogger(__name__)
+        self.collection = None
+
+        if persist:
+            self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
+            self.db = self.mongo_client[self.bot.config.mongoDbName]
+            self.collection = self.db[self.bot.config.mongoAudioMetadataCollectionName]
+            self._ensure_indexes(ttl_days)
+
+        self.logger.info(f"Initialized AudioMetadataCache with {max_entries} tracks in memory (persist={persist})")
+
+    def _ensure_indexes(self, ttl_days: int):
+        """Create indexes on the collection for faster retrieval."""
+        try:
+            self.collection.create_index([("queries", pymongo.ASCENDING)])
+            if ttl_days > 0:
+                self.collection.create_index([("updated_at", pymongo.ASCENDING)], expireAfterSeconds=ttl_days * 86400)
+            self.logger.info("Created indexes on audio metadata collection")
+        except pymongo.errors.OperationFailure as e:
+            self.logger.warning(f"Could not create indexes: {e}")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """URLs are kept as-is since video ids are case sensitive, searches ignore case and extra whitespace."""
+        query = query.strip()
+        if query.startswith("http"):
+            return query
+        return re.sub(r"\s+", " ", query).casefold()
+
+    def get_stream_expiry(self, stream_url: str, now: float) -> float:
+        """Expiry of a stream URL, from the expire= parameter googlevideo URLs carry or the configured TTL otherwise."""
+        expire = parse_qs(urlparse(stream_url).query).get("expire")
+        if expire and expire[0].isdigit():
+            return int(expire[0]) - self.stream_expiry_margin_seconds
+        return now + self.stream_ttl_seconds
+
+    async def get(self, query: str) -> CachedTrack | None:
+        key = self.normalize_query(query)
+        webpage_url = self.queries.get(key, key)
+
+        if (track := self.tracks.get(webpage_url)) is not None:
+            self.tracks.move_to_end(webpage_url)
+            self.queries[key] = webpage_url
+            self.queries.move_to_end(key)
+            return self._hit(track)
+
+        if self.collection is not None:
+            doc = await asyncio.to_thread(self.collection.find_one, {"$or": [{"_id": key}, {"queries": key}]})
+            if doc:
+                track = CachedTrack(metadata=doc["metadata"], stream_url=doc.get("stream_url"), stream_expires_at=doc.get("stream_expires_at", 0.0))
+                self._put_memory(key, doc["_id"], track)
+                return self._hit(track)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, query: str, metadata: dict[str, Any], stream_url: str | None) -> CachedTrack:
+        """Cache a freshly extracted track under both the query that found it and its webpage URL."""
+        key = self.normalize_query(query)
+        webpage_url = metadata["webpage_url"]
+        track = CachedTrack(metadata=metadata, stream_url=stream_url, stream_expires_at=self.get_stream_expiry(stream_url, time.time()) if stream_url else 0.0)
+        self._put_memory(key, webpage_url, track)
+
+        if self.collection is None:
+            return track
+        try:
+            await asyncio.to_thread(
+                self.collection.update_one,
+                {"_id": webpage_url},
+                {
+                    "$set": {"metadata": metadata, "stream_url": track.stream_url, "stream_expires_at": track.stream_expires_at, "updated_at": datetime.datetime.now(datetime.UTC)},
+                    "$addToSet": {"queries": key},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            self.logger.error(f"Error persisting audio metadata for {webpage_url}: {e}", exc_info=True)
+        return track
+
+    def get_metrics(self) -> dict:
+        return {"tracks": len(self.tracks), "queries": len(self.queries), **self.stats}
+
+    def _hit(self, track: CachedTrack) -> CachedTrack:
+        self.stats["hits"] += 1
+        if not track.has_fresh_stream(time.time()):
+            self.stats["stale_streams"] += 1
+        return track
+
+    def _put_memory(self, key: str, webpage_url: str, track: CachedTrack):
+        self.tracks[webpage_url] = track
+        self.tracks.move_to_end(webpage_url)
+        for alias in (key, webpage_url):
+            self.queries[alias] = webpage_url
+            self.queries.move_to_end(alias)
+
+        while len(self.tracks) > self.max_entries:
+            self.tracks.popitem(last=False)
+        # Every track has at least one alias, so a few aliases per track is plenty
+        while len(self.queries) > self.max_entries * 4:
+            self.queries.popitem(last=False)
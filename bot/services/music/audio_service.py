@@ -1,24 +1,65 @@
+import asyncio
 import logging
 import os
-from typing import Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
 
 import discord
 import yt_dlp
 
+from .audio_file_cache import AudioFileCache
+from .audio_metadata_cache import AudioMetadataCache, CachedTrack
 from .types import AudioMetaData, AudioSource, FilterPreset
 
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+# AudioMetaData fields that describe the track itself, everything else is per request or expires
+CACHED_METADATA_FIELDS = ("title", "author", "author_url", "duration", "webpage_url", "thumbnail_url", "source", "likes", "codec")
+
 
 class AudioService:
-    def __init__(self):
+    def __init__(self, bot: "Juno"):
+        self.config = config = bot.config.music
         self.ydl_opts = {
-            "format": ("bestaudio[acodec=mp3][protocol!=m3u8]/bestaudio[acodec^=mp4a][protocol!=m3u8]/bestaudio[protocol!=m3u8]/bestaudio/best"),
+            # Opus first so unfiltered playback can hand the packets to Discord without transcoding
+            "format": ("bestaudio[acodec=opus][protocol!=m3u8]/bestaudio[acodec=mp3][protocol!=m3u8]/bestaudio[acodec^=mp4a][protocol!=m3u8]/bestaudio[protocol!=m3u8]/bestaudio/best"),
             "quiet": True,
             "noplaylist": True,
             "extract_flat": False,
         }
         self.logger = logging.getLogger(__name__)
 
+        # Each worker thread keeps its own YoutubeDL, they are not safe to share across threads
+        self.thread_state = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=config.extractWorkers, thread_name_prefix="ytdlp-worker", initializer=self._get_ydl)
+        for _ in range(config.extractWorkers):
+            # Spin every worker up now so the first /play does not pay for extractor imports
+            self.executor.submit(lambda: None)
+        self.metadata_cache = AudioMetadataCache(
+            bot,
+            config.metadataCacheSize,
+            config.metadataCachePersist,
+            config.metadataCacheTtlDays,
+            config.streamUrlTtlSeconds,
+            config.streamUrlExpiryMarginSeconds,
+        )
+        self.file_cache = AudioFileCache(config)
+        self.logger.info(f"Initialized AudioService with {config.extractWorkers} extraction workers and a {config.extractTimeoutSeconds}s timeout")
+
+    def _get_ydl(self) -> yt_dlp.YoutubeDL:
+        if not hasattr(self.thread_state, "ydl"):
+            self.thread_state.ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+        return self.thread_state.ydl
+
+    async def close(self):
+        """Stop the extraction workers, dropping any extraction that has not started yet, and any song downloads."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        await self.file_cache.close()
+
     def is_direct_media_url(self, url: str) -> bool:
         """Check if the URL is a direct link to a media file."""
         parsed_url = urlparse(url)
@@ -35,7 +76,61 @@ class AudioService:
         ]
         return any(path.endswith(ext) for ext in media_extensions)
 
-    def extract_info(self, query: str) -> dict[str, Any]:
+    async def resolve(self, query: str) -> AudioMetaData:
+        """Resolve a query or URL to song metadata, from the metadata cache when possible.
+
+        A cached track whose stream URL has expired is re-extracted from its webpage URL, which skips the search.
+        """
+        if query.startswith("http") and self.is_direct_media_url(query):
+            # Direct links need no network lookup, so they are not worth caching
+            return self.get_metadata(self._extract_info_sync(query))
+
+        track = await self.metadata_cache.get(query)
+        if track is None:
+            metadata = self.get_metadata(await self.extract_info(query))
+            await self.metadata_cache.put(query, {name: getattr(metadata, name) for name in CACHED_METADATA_FIELDS} | {"source": metadata.source.value}, metadata.url)
+            return metadata
+
+        if not track.has_fresh_stream(time.time()):
+            track = await self._refresh_track(query, track)
+
+        return self._from_cached_track(track)
+
+    async def refresh_stream_url(self, song: AudioMetaData) -> str:
+        """Make sure a queued song's stream URL is still valid, re-resolving it from its webpage URL if not. Returns the URL."""
+        if song.source == AudioSource.DIRECT_URL or not song.webpage_url:
+            return song.url
+
+        track = await self.metadata_cache.get(song.webpage_url)
+        if track is None:
+            track = CachedTrack(metadata={name: getattr(song, name) for name in CACHED_METADATA_FIELDS} | {"source": song.source.value})
+        if not track.has_fresh_stream(time.time()):
+            track = await self._refresh_track(song.webpage_url, track)
+
+        song.url = track.stream_url
+        song.codec = track.metadata.get("codec")
+        return song.url
+
+    async def _refresh_track(self, query: str, track: CachedTrack) -> CachedTrack:
+        self.logger.info(f"[RESOLVE] - Stream URL for '{track.metadata['title']}' expired, re-resolving it")
+        metadata = self.get_metadata(await self.extract_info(track.metadata["webpage_url"]))
+        # A re-resolve can land on a different format, so the codec travels with the stream URL
+        return await self.metadata_cache.put(query, track.metadata | {"codec": metadata.codec}, metadata.url)
+
+    def _from_cached_track(self, track: CachedTrack) -> AudioMetaData:
+        fields = dict(track.metadata)
+        return AudioMetaData(**fields | {"source": AudioSource(fields["source"]), "url": track.stream_url})
+
+    async def extract_info(self, query: str) -> dict[str, Any]:
+        """Resolve a query or URL on the extraction pool without blocking the event loop.
+
+        Raises TimeoutError if extraction takes longer than the configured timeout. Cancelling or timing out
+        drops the request if it has not started yet, a running extraction finishes in the background.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(self.executor, self._extract_info_sync, query), timeout=self.config.extractTimeoutSeconds)
+
+    def _extract_info_sync(self, query: str) -> dict[str, Any]:
         if query.startswith("http") and self.is_direct_media_url(query):
             parsed_url = urlparse(query)
             filename = os.path.basename(parsed_url.path)
@@ -50,50 +145,65 @@ class AudioService:
             }
             return info
 
-        with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-            self.logger.info("[EXTRACTINFO] - trying to get song info with ytdlp")
-            if query.startswith("http"):
-                try:
-                    return ydl.extract_info(query, download=False)
-                except yt_dlp.utils.DownloadError as e:
-                    print(f"Error extracting info: {e}")
-                    raise
-            else:
+        ydl = self._get_ydl()
+        self.logger.info("[EXTRACTINFO] - trying to get song info with ytdlp")
+        if query.startswith("http"):
+            try:
+                return ydl.extract_info(query, download=False)
+            except yt_dlp.utils.DownloadError as e:
+                self.logger.error(f"Error extracting info: {e}")
+                raise
+        else:
+            try:
+                info = ydl.extract_info(f"ytsearch:{query}", download=False)
+                if info.get("entries"):
+                    info = info["entries"][0]
+                return info
+            except yt_dlp.utils.DownloadError:
                 try:
-                    info = ydl.extract_info(f"ytsearch:{query}", download=False)
+                    info = ydl.extract_info(f"scsearch:{query}", download=False)
                     if info.get("entries"):
                         info = info["entries"][0]
                     return info
-                except yt_dlp.utils.DownloadError:
-                    try:
-                        info = ydl.extract_info(f"scsearch:{query}", download=False)
-                        if info.get("entries"):
-                            info = info["entries"][0]
-                        return info
-                    except yt_dlp.utils.DownloadError as e:
-                        print(f"Error searching: {e}")
-                        raise
+                except yt_dlp.utils.DownloadError as e:
+                    self.logger.error(f"Error searching: {e}")
+                    raise
 
     def get_audio_source(
         self,
         url: str,
         filter_preset: FilterPreset | None = None,
         position: float = 0,
-    ) -> discord.FFmpegPCMAudio:
-        self.logger.info("[GETAUDIOSOURCE] - Getting the FFmpegPCMAudio source to play the song")
-        before_options = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 "
-
-        if position > 0:
-            self.logger.info("Recieved position when getting audio source. Attempting to seek to position.")
-            options = f"-vn -ss {position}"
-        else:
+        codec: str | None = None,
+    ) -> discord.AudioSource:
+        """Get an FFmpeg source for the song.
+
+        Without a filter FFmpeg outputs Opus, copying the stream as-is when it already is Opus, so discord.py only
+        sends packets. Filters need decoded audio, so they use the PCM path where discord.py encodes every frame.
+        """
+        if os.path.isabs(url):
+            # A local copy from the file cache seeks on the input, which jumps straight to the position
+            before_options = f"-ss {position}" if position > 0 else ""
             options = "-vn"
+        else:
+            before_options = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 "
+            if position > 0:
+                self.logger.info("Recieved position when getting audio source. Attempting to seek to position.")
+                options = f"-vn -ss {position}"
+            else:
+                options = "-vn"
+
+        if filter_preset and filter_preset != FilterPreset.NONE and (ffmpeg_filter := filter_preset.ffmpeg_filter):
+            self.logger.info("[GETAUDIOSOURCE] - Getting the FFmpegPCMAudio source to play the filtered song")
+            return discord.FFmpegPCMAudio(url, before_options=before_options, options=f"{options} -af {ffmpeg_filter}")
 
-        if filter_preset and filter_preset != FilterPreset.NONE:
-            if ffmpeg_filter := filter_preset.ffmpeg_filter:
-                options += f" -af {ffmpeg_filter}"
+        if not self.config.opusPassthrough:
+            self.logger.info("[GETAUDIOSOURCE] - Getting the FFmpegPCMAudio source to play the song")
+            return discord.FFmpegPCMAudio(url, before_options=before_options, options=options)
 
-        return discord.FFmpegPCMAudio(url, before_options=before_options, options=options)
+        opus_codec = "copy" if codec == "opus" else "libopus"
+        self.logger.info(f"[GETAUDIOSOURCE] - Getting the FFmpegOpusAudio source to play the song (codec={opus_codec})")
+        return discord.FFmpegOpusAudio(url, bitrate=self.config.opusBitrate, codec=opus_codec, before_options=before_options, options=options)
 
     def get_metadata(self, info: dict[str, Any]) -> AudioMetaData:
         source_type = AudioSource.YOUTUBE
@@ -122,4 +232,5 @@ class AudioService:
             webpage_url=info.get("webpage_url", ""),
             thumbnail_url=info.get("thumbnail"),
             source=source_type,
+            codec=info.get("acodec") if info.get("acodec") != "none" else None,
         )
@@ -5,9 +5,9 @@ import time
 from typing import TYPE_CHECKING
 
 import discord
-from discord import FFmpegPCMAudio, Interaction
+from discord import Interaction
 
-from .priority_music_queue import PriorityMusicQueue
+from .music_queue import MusicQueue
 from .types import AudioMetaData, FilterPreset, MusicPlayerActionResponse
 
 if TYPE_CHECKING:
@@ -18,11 +18,18 @@ class MusicPlayer:
     def __init__(self, bot: "Juno", guild: discord.Guild):
         self.bot = bot
         self.guild = guild
-        self.queue = PriorityMusicQueue()
+        self.queue = MusicQueue()
         self.voice_client: discord.VoiceClient = None
         self.played_at = None
         self.paused_at = None
         self.current: AudioMetaData = None
+        self.advancing = False
+        # Idle tracking for MusicQueueService's reaper, in time.monotonic()
+        self.last_active = time.monotonic()
+        self.empty_since: float | None = None
+        self.prefetch_task: asyncio.Task | None = None
+        # FFmpeg started ahead of time for the song expected to play next
+        self.prepared: tuple[AudioMetaData, discord.AudioSource] | None = None
         self.logger = logging.getLogger(__name__)
 
     def is_playing(self):
@@ -35,7 +42,7 @@ class MusicPlayer:
 
     def is_blocked(self):
         """Check is the player is blocked from playing a new song"""
-        return self.is_playing() or self.is_paused() or not self.queue.empty()
+        return self.is_playing() or self.is_paused() or self.advancing or len(self.queue) > 0
 
     def is_in_vc(self):
         """Check if the bot is in a vc"""
@@ -47,6 +54,7 @@ class MusicPlayer:
 
         try:
             user_channel = interaction.user.voice.channel
+            self.last_active = time.monotonic()
             self.voice_client = await user_channel.connect(self_deaf=True)
             return MusicPlayerActionResponse(is_success=True, message=f"Successfully joined the VC '{user_channel.name}'.")
         except Exception as e:
@@ -58,28 +66,34 @@ class MusicPlayer:
             return MusicPlayerActionResponse(is_success=False, message="Not currently in a VC.")
 
         await self.voice_client.disconnect()
-        self.queue = PriorityMusicQueue()
+        self._cancel_prefetch()
+        self.bot.audio_service.file_cache.pin(self.guild.id, [])
+        self.queue.clear()
         self.voice_client = None
         self.current = None
+        self.bot.music_state_service.mark_dirty(self.guild.id)
         return MusicPlayerActionResponse(is_success=True, message="Successfully disconnected from the VC.")
 
     async def add(self, song: AudioMetaData) -> MusicPlayerActionResponse:
         """Add a song to queue"""
+        self.last_active = time.monotonic()
         if self.is_blocked():
             self.logger.info(f"[ADD] - Bot is currently playing audio or the queue has items, adding song '{song.title}' to the queue")
             if song.to_front:
-                await self.queue.put_front(song)
+                self.queue.push_front(song)
             else:
-                await self.queue.put(song)
+                self.queue.push(song)
+            self.bot.music_state_service.mark_dirty(self.guild.id)
             return MusicPlayerActionResponse(is_success=True, message=f"Successfully added the song '{song.title}' to the queue.")
         else:
             self.logger.info(f"[ADD] - Bot is not playing audio and the queue is empty, playing song '{song.title}'")
             self.current = song
             self.played_at = time.time()
-            self._play(self.bot.audio_service.get_audio_source(url=song.url, filter_preset=song.filter_preset, position=song.position))
+            self._play(self._create_source(song))
             if song.should_pause:
                 self._pause()
 
+            self.bot.music_state_service.mark_dirty(self.guild.id)
             if not song.skip_now_playing_embed:
                 await self._send_now_playing_embed(self.current)
 
@@ -99,7 +113,7 @@ class MusicPlayer:
 
         if self.is_playing():
             self._pause()
-            self.paused_at = time.time()
+            self.bot.music_state_service.mark_dirty(self.guild.id)
             return MusicPlayerActionResponse(is_success=True, message="Successfully paused the audio.")
 
         return MusicPlayerActionResponse(is_success=False, message="Failed to pause audio for unknown reason.")
@@ -110,6 +124,7 @@ class MusicPlayer:
 
         if self.is_paused():
             self._resume()
+            self.bot.music_state_service.mark_dirty(self.guild.id)
             return MusicPlayerActionResponse(is_success=True, message="Successfully resumed the audio.")
 
         return MusicPlayerActionResponse(is_success=False, message="Failed to resume audio for unknown reason.")
@@ -118,12 +133,7 @@ class MusicPlayer:
         if not (self.is_playing() or self.is_paused()):
             return MusicPlayerActionResponse(is_success=False, message="No audio is currently playing / paused, cannot apply a filter.")
 
-        current_position = 0
-        if self.played_at:
-            if self.is_paused() and self.paused_at:
-                current_position = int(self.paused_at - self.played_at)
-            else:
-                current_position = int(time.time() - self.played_at)
+        current_position = int(self.get_position())
 
         filtered_song = AudioMetaData.from_dict(self.current.to_dict())
         filtered_song.text_channel = self.current.text_channel
@@ -177,25 +187,111 @@ class MusicPlayer:
 
         return MusicPlayerActionResponse(is_success=True, message=f"Seeked to {position} seconds!")
 
+    def get_position(self) -> float:
+        """Seconds into the current song"""
+        if not self.played_at:
+            return 0
+        if self.is_paused() and self.paused_at:
+            return self.paused_at - self.played_at
+        return time.time() - self.played_at
+
     def _pause(self):
         self.voice_client.pause()
+        self.paused_at = time.time()
 
     def _resume(self):
         self.voice_client.resume()
+        if self.paused_at:
+            # The song did not advance while paused, so its start moves forward by the time spent paused
+            self.played_at += time.time() - self.paused_at
+            self.paused_at = None
 
     def _stop(self):
         self.voice_client.stop()
 
-    def _play(self, audio_source: FFmpegPCMAudio):
+    def _play(self, audio_source: discord.AudioSource):
         current_time = time.time()
 
         if self.current and self.current.position:
             self.played_at = int(current_time - self.current.position)
         else:
             self.played_at = current_time
+        self.paused_at = None
 
         self.voice_client.play(audio_source, after=self._after_wrapper())
 
+        # Keep a local copy while it plays so seeks and filter changes do not stream it again
+        self.bot.audio_service.file_cache.pin(self.guild.id, [self.current])
+        self.bot.audio_service.file_cache.prefetch(self.current)
+
+        if self.prefetch_task:
+            self.prefetch_task.cancel()
+        if self.bot.config.music.prefetchTracks > 0:
+            self.prefetch_task = asyncio.create_task(self._prefetch(self.current))
+
+    async def _prefetch(self, song: AudioMetaData):
+        """Shortly before a song ends, refresh the next songs' stream URLs and start FFmpeg for the one after it."""
+        config = self.bot.config.music
+        if not song or not song.duration:
+            # Live streams have no end to prepare for
+            return
+
+        # Re-checked in steps so pauses, seeks and skips are picked up
+        while (remaining := song.duration - self.get_position()) > config.prefetchLeadSeconds:
+            await asyncio.sleep(min(remaining - config.prefetchLeadSeconds, 5))
+
+        upcoming = self.queue.peek(config.prefetchTracks)
+        if not upcoming:
+            return
+
+        results = await asyncio.gather(*(self.bot.audio_service.refresh_stream_url(upcoming_song) for upcoming_song in upcoming), return_exceptions=True)
+        for upcoming_song, result in zip(upcoming, results, strict=True):
+            if isinstance(result, Exception):
+                self.logger.warning(f"[PREFETCH] - Could not refresh the stream URL for '{upcoming_song.title}': {result}")
+
+        next_song = upcoming[0]
+        if isinstance(results[0], Exception) or self.current is not song:
+            return
+        if config.fileCacheNextTrack:
+            self.bot.audio_service.file_cache.pin(self.guild.id, [song, next_song])
+            self.bot.audio_service.file_cache.prefetch(next_song)
+        self._discard_prepared()
+        self.prepared = (next_song, self._create_source(next_song))
+        self.logger.info(f"[PREFETCH] - Started FFmpeg early for the next song '{next_song.title}'")
+
+    async def _get_source(self, song: AudioMetaData) -> discord.AudioSource:
+        """Use the FFmpeg prepared for this song if there is one, otherwise start a new one from the local copy or a fresh stream URL."""
+        prepared, self.prepared = self.prepared, None
+        if prepared and prepared[0] is song:
+            return prepared[1]
+        if prepared:
+            prepared[1].cleanup()
+
+        # A local copy plays without the stream URL, so seeks and filter changes skip the re-extraction
+        local_path = self.bot.audio_service.file_cache.get_path(song)
+        if not local_path:
+            try:
+                await self.bot.audio_service.refresh_stream_url(song)
+            except Exception as e:
+                self.logger.warning(f"[GETSOURCE] - Could not refresh the stream URL for '{song.title}', trying the old one: {e}")
+        return self._create_source(song, local_path or song.url)
+
+    def _create_source(self, song: AudioMetaData, path: str | None = None) -> discord.AudioSource:
+        """Start FFmpeg for a song, reading the local copy when the file cache has one unless a path is given"""
+        path = path or self.bot.audio_service.file_cache.get_path(song) or song.url
+        return self.bot.audio_service.get_audio_source(path, song.filter_preset, song.position, song.codec)
+
+    def _discard_prepared(self):
+        if self.prepared:
+            self.prepared[1].cleanup()
+            self.prepared = None
+
+    def _cancel_prefetch(self):
+        if self.prefetch_task:
+            self.prefetch_task.cancel()
+            self.prefetch_task = None
+        self._discard_prepared()
+
     def _after_wrapper(self):
         def after_callback(error):
             loop = self.bot.loop
@@ -213,16 +309,24 @@ class MusicPlayer:
         else:
             self.logger.info(f"[ONTRACKEND] - Song Completed Playback: {self.current.title if self.current else 'UNKNOWN'}")
 
-        if not self.queue.empty():
+        if len(self.queue) > 0:
             self.logger.info("[ONTRACKEND] - Queue is not empty, moving on to next song")
-            self.current = await self.queue.get()
-            self._play(self.bot.audio_service.get_audio_source(self.current.url, self.current.filter_preset, self.current.position))
+            self.current = self.queue.pop_front()
+            # Keeps add() from starting a song of its own while the stream URL is refreshed
+            self.advancing = True
+            try:
+                audio_source = await self._get_source(self.current)
+            finally:
+                self.advancing = False
+            self._play(audio_source)
             if self.current.should_pause:
                 self._pause()
             else:
                 await self._send_now_playing_embed(self.current)
 
+        self.bot.music_state_service.mark_dirty(self.guild.id)
+
     async def _send_now_playing_embed(self, song: AudioMetaData):
         now_playing_embed, emoji_file = self.bot.embed_service.create_now_playing_embed(song)
         discord_file = None if not emoji_file else discord.File(os.path.join(os.getcwd(), "emojis", emoji_file), emoji_file)
-        await song.text_channel.send(embed=now_playing_embed, file=discord_file)
+        await self.bot.outbound_dispatch_service.send(song.text_channel, embed=now_playing_embed, file=discord_file)
@@ -0,0 +1,145 @@
+import itertools
+import random
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from .types import AudioMetaData
+
+
+class QueueSnapshot:
+    """Read-only view of a MusicQueue as it was when the snapshot was taken.
+
+    Pages are read straight from the live queue until it changes, only then is the view copied once, so
+    paging through a large queue that nobody touches never copies it.
+    """
+
+    def __init__(self, queue: "MusicQueue"):
+        self.queue = queue
+        self.version = queue.version
+        self.length = len(queue)
+        self.frozen: tuple[AudioMetaData, ...] | None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: slice) -> list[AudioMetaData]:
+        if not isinstance(index, slice):
+            raise TypeError("QueueSnapshot only supports slicing")
+        if self.frozen is not None:
+            return list(self.frozen[index])
+        start, stop, step = index.indices(self.length)
+        return list(itertools.islice(self.queue.entries.values(), start, stop, step))
+
+    def freeze(self):
+        if self.frozen is None:
+            self.frozen = tuple(self.queue.entries.values())
+
+
+class MusicQueue:
+    """Song queue of a music player, with every song keyed by an entry id.
+
+    Backed by an OrderedDict, so pushing to either end, popping the front and removing by id are all O(1).
+    Moving to the middle, shuffling and deduping rebuild the order in O(n).
+    """
+
+    def __init__(self):
+        self.entries: OrderedDict[int, AudioMetaData] = OrderedDict()
+        self.version = 0
+        self.entry_ids = itertools.count(1)
+        self.snapshot_ref: weakref.ref[QueueSnapshot] | None = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[AudioMetaData]:
+        return iter(self.entries.values())
+
+    def push(self, song: AudioMetaData) -> int:
+        """Add a song to the back of the queue. Returns its entry id."""
+        self._changed()
+        entry_id = next(self.entry_ids)
+        self.entries[entry_id] = song
+        return entry_id
+
+    def push_front(self, song: AudioMetaData) -> int:
+        """Add a song to the front of the queue. Returns its entry id."""
+        entry_id = self.push(song)
+        self.entries.move_to_end(entry_id, last=False)
+        return entry_id
+
+    def pop_front(self) -> AudioMetaData | None:
+        if not self.entries:
+            return None
+        self._changed()
+        _, song = self.entries.popitem(last=False)
+        return song
+
+    def remove(self, entry_id: int) -> AudioMetaData | None:
+        if entry_id not in self.entries:
+            return None
+        self._changed()
+        return self.entries.pop(entry_id)
+
+    def move(self, entry_id: int, position: int) -> bool:
+        """Move a song to a zero-based position, clamped to the queue. Returns False if the id is not queued."""
+        if entry_id not in self.entries:
+            return False
+        self._changed()
+
+        position = max(0, min(position, len(self.entries) - 1))
+        if position == 0:
+            self.entries.move_to_end(entry_id, last=False)
+        elif position == len(self.entries) - 1:
+            self.entries.move_to_end(entry_id)
+        else:
+            song = self.entries.pop(entry_id)
+            items = list(self.entries.items())
+            items.insert(position, (entry_id, song))
+            self.entries = OrderedDict(items)
+        return True
+
+    def shuffle(self):
+        self._changed()
+        items = list(self.entries.items())
+        random.shuffle(items)
+        self.entries = OrderedDict(items)
+
+    def dedupe(self) -> int:
+        """Drop later copies of songs that are already queued. Returns how many were removed."""
+        seen = set()
+        duplicates = []
+        for entry_id, song in self.entries.items():
+            key = song.webpage_url or song.url
+            if key in seen:
+                duplicates.append(entry_id)
+            seen.add(key)
+
+        if duplicates:
+            self._changed()
+            for entry_id in duplicates:
+                del self.entries[entry_id]
+        return len(duplicates)
+
+    def clear(self):
+        self._changed()
+        self.entries.clear()
+
+    def peek(self, count: int) -> list[AudioMetaData]:
+        """The next count songs, without removing them."""
+        return list(itertools.islice(self.entries.values(), count))
+
+    def snapshot(self) -> QueueSnapshot:
+        """A view of the queue as it is now, shared by every caller until the queue changes."""
+        snapshot = self.snapshot_ref() if self.snapshot_ref else None
+        if snapshot is None or snapshot.version != self.version:
+            snapshot = QueueSnapshot(self)
+            self.snapshot_ref = weakref.ref(snapshot)
+        return snapshot
+
+    def _changed(self):
+        # A snapshot still held by a view keeps showing the old queue, so copy it before the first change
+        if self.snapshot_ref and (snapshot := self.snapshot_ref()) is not None and snapshot.version == self.version:
+            snapshot.freeze()
+        self.snapshot_ref = None
+        self.version += 1
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+import time
 from typing import TYPE_CHECKING
 
 import discord
@@ -9,16 +12,103 @@ if TYPE_CHECKING:
 
 
 class MusicQueueService:
+    """Owns one MusicPlayer per guild with music going, and reaps players that sit idle.
+
+    A player is released once its voice channel has had no listeners for emptyChannelTimeoutSeconds, once
+    nothing has played for idleTimeoutMinutes, or within one sweep once it is disconnected with nothing queued.
+    """
+
     def __init__(self, bot: "Juno"):
         self.bot = bot
+        self.config = bot.config.music
         self.players: dict[int, MusicPlayer] = {}
+        self.reaper_task: asyncio.Task | None = None
+        self.stats = {"created": 0, "reaped": 0}
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        if not self.reaper_task:
+            self.reaper_task = asyncio.create_task(self._reaper())
+
+    async def stop(self):
+        if self.reaper_task:
+            self.reaper_task.cancel()
+            await asyncio.gather(self.reaper_task, return_exceptions=True)
+            self.reaper_task = None
 
     def get_player(self, guild: discord.Guild) -> MusicPlayer:
         if guild.id not in self.players:
             player = MusicPlayer(self.bot, guild)
             self.players[guild.id] = player
-        return self.players[guild.id]
+            self.stats["created"] += 1
+        player = self.players[guild.id]
+        # Every command reaches its player through here, so a command counts as activity for the reaper
+        player.last_active = time.monotonic()
+        return player
 
     def remove_player(self, guild: discord.Guild):
         if guild.id in self.players:
             del self.players[guild.id]
+
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        """Track listeners leaving and joining the channels players are connected to."""
+        player = self.players.get(member.guild.id)
+        if not player:
+            return
+
+        if member.id == self.bot.user.id and before.channel and not after.channel:
+            # Disconnected from outside (kicked, channel deleted), nothing is left to play to
+            await self._reap(member.guild.id, player, "disconnected from voice")
+            return
+
+        if player.voice_client and player.voice_client.channel in (before.channel, after.channel):
+            self._update_listeners(player, time.monotonic())
+
+    def get_metrics(self) -> dict:
+        active = sum(1 for player in self.players.values() if player.is_playing() or player.advancing)
+        connected = sum(1 for player in self.players.values() if player.is_in_vc())
+        return {"players": len(self.players), "active": active, "idle": len(self.players) - active, "connected": connected, **self.stats}
+
+    async def _reaper(self):
+        while True:
+            await asyncio.sleep(self.config.reapIntervalSeconds)
+            now = time.monotonic()
+            for guild_id, player in list(self.players.items()):
+                if reason := self._get_idle_reason(player, now):
+                    try:
+                        await self._reap(guild_id, player, reason)
+                    except Exception as e:
+                        self.logger.error(f"Error reaping music player for guild {guild_id}: {e}", exc_info=True)
+
+    def _update_listeners(self, player: MusicPlayer, now: float):
+        listeners = [member for member in player.voice_client.channel.members if not member.bot]
+        if listeners:
+            player.empty_since = None
+        elif player.empty_since is None:
+            player.empty_since = now
+
+    def _get_idle_reason(self, player: MusicPlayer, now: float) -> str | None:
+        if not player.is_in_vc():
+            # The grace period covers players that are still connecting
+            if len(player.queue) == 0 and now - player.last_active >= self.config.reapIntervalSeconds:
+                return "not connected"
+            return None
+
+        if player.is_playing() or player.advancing:
+            player.last_active = now
+        self._update_listeners(player, now)
+
+        if player.empty_since is not None and now - player.empty_since >= self.config.emptyChannelTimeoutSeconds:
+            return "voice channel empty"
+        if now - player.last_active >= self.config.idleTimeoutMinutes * 60:
+            return "nothing played"
+        return None
+
+    async def _reap(self, guild_id: int, player: MusicPlayer, reason: str):
+        # leave() stops FFmpeg, drops prepared sources and cache pins, and clears the saved state
+        if player.is_in_vc():
+            await player.leave()
+        if self.players.get(guild_id) is player:
+            del self.players[guild_id]
+        self.stats["reaped"] += 1
+        self.logger.info(f"Released music player for guild {guild_id}: {reason}")
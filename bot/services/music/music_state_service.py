@@ -0,0 +1,185 @@
+import asyncio
+import datetime
+import logging
+from typing import TYPE_CHECKING
+
+import discord
+import pymongo
+from bson import Int64
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+from .types import AudioMetaData
+
+if TYPE_CHECKING:
+    from bot.juno import Juno
+
+    from .music_player import MusicPlayer
+
+
+class MusicStateService:
+    """Snapshots every guild's queue and playback position to MongoDB so playback can resume after a restart.
+
+    Players only mark their guild dirty, the writer coalesces changes that land within a short window into
+    one bulk write. Playing guilds are also checkpointed on an interval so the saved position stays close, a
+    checkpoint only updates the position unless the guild is dirty as well.
+    """
+
+    def __init__(self, bot: "Juno"):
+        self.bot = bot
+        self.config = bot.config.music
+        self.dirty: set[int] = set()
+        self.changed = asyncio.Event()
+        self.writer_task: asyncio.Task | None = None
+        self.resume_task: asyncio.Task | None = None
+        self.stats = {"flushes": 0, "writes": 0, "resumed": 0}
+        self.logger = logging.getLogger(__name__)
+        self.collection = None
+
+        if self.config.persistState:
+            self.mongo_client = pymongo.MongoClient(self.bot.config.mongoUri)
+            self.db = self.mongo_client[self.bot.config.mongoDbName]
+            self.collection = self.db[self.bot.config.mongoMusicStateCollectionName]
+        self.logger.info(f"Initialized MusicStateService (persist={self.config.persistState}, resume={self.config.resumeOnStartup})")
+
+    def start(self):
+        if self.collection is None or self.writer_task:
+            return
+        self.writer_task = asyncio.create_task(self._writer())
+        if self.config.resumeOnStartup:
+            self.resume_task = asyncio.create_task(self._resume_all())
+
+    async def stop(self):
+        """Stop the writer after saving every guild one last time, while the voice connections are still up."""
+        tasks = [task for task in (self.writer_task, self.resume_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.writer_task = None
+        self.resume_task = None
+
+        if self.collection is not None:
+            await self._flush(self.dirty | set(self.bot.music_queue_service.players), set())
+
+    def mark_dirty(self, guild_id: int):
+        if self.collection is None:
+            return
+        self.dirty.add(guild_id)
+        self.changed.set()
+
+    def get_metrics(self) -> dict:
+        return {"dirty": len(self.dirty), **self.stats}
+
+    async def _writer(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=self.config.stateCheckpointSeconds)
+                # Let the rest of a burst (skip, re-queue, embed) land before writing
+                await asyncio.sleep(self.config.stateFlushSeconds)
+            except TimeoutError:
+                pass
+
+            self.changed.clear()
+            playing = {guild_id for guild_id, player in self.bot.music_queue_service.players.items() if player.is_playing()}
+            dirty, self.dirty = self.dirty, set()
+            await self._flush(dirty, playing - dirty)
+
+    async def _flush(self, dirty: set[int], checkpoints: set[int]):
+        """Write the full state of dirty guilds and only the playback position of checkpointed ones."""
+        operations = []
+        for guild_id in dirty:
+            player = self.bot.music_queue_service.players.get(guild_id)
+            state = self._get_state(player) if player else None
+            if state:
+                operations.append(ReplaceOne({"_id": Int64(guild_id)}, state, upsert=True))
+            else:
+                operations.append(DeleteOne({"_id": Int64(guild_id)}))
+        for guild_id in checkpoints:
+            player = self.bot.music_queue_service.players.get(guild_id)
+            if player:
+                position = {"position": int(player.get_position()), "paused": player.is_paused(), "updated_at": datetime.datetime.now(datetime.UTC)}
+                operations.append(UpdateOne({"_id": Int64(guild_id)}, {"$set": position}))
+
+        if not operations:
+            return
+        try:
+            await asyncio.to_thread(self.collection.bulk_write, operations, ordered=False)
+            self.stats["flushes"] += 1
+            self.stats["writes"] += len(operations)
+        except Exception as e:
+            self.logger.error(f"Error saving music state for {len(operations)} guilds: {e}", exc_info=True)
+            # A missed checkpoint is redone on the next interval, only full writes need retrying
+            self.dirty |= dirty
+
+    def _get_state(self, player: "MusicPlayer") -> dict | None:
+        """The document to save for a player, or None once it has nothing left to resume."""
+        if not player.voice_client or not (player.is_playing() or player.is_paused() or len(player.queue) > 0):
+            return None
+
+        songs = [player.current, *player.queue] if player.current else list(player.queue)
+        text_channel = next((song.text_channel for song in songs if song.text_channel), None)
+        return {
+            "voice_channel_id": Int64(player.voice_client.channel.id),
+            "text_channel_id": Int64(text_channel.id) if text_channel else None,
+            "current": player.current.to_dict() if player.current and (player.is_playing() or player.is_paused()) else None,
+            "position": int(player.get_position()),
+            "paused": player.is_paused(),
+            "queue": [song.to_dict() for song in player.queue],
+            "updated_at": datetime.datetime.now(datetime.UTC),
+        }
+
+    async def _resume_all(self):
+        await self.bot.wait_until_ready()
+        cutoff = datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=self.config.resumeMaxAgeMinutes)
+        docs = await asyncio.to_thread(lambda: list(self.collection.find({"updated_at": {"$gte": cutoff}})))
+
+        # Guilds resume in parallel, each only resolves the song it starts with, the prefetcher refreshes the rest before they play
+        results = await asyncio.gather(*(self._resume_guild(doc) for doc in docs), return_exceptions=True)
+        for doc, result in zip(docs, results, strict=True):
+            if isinstance(result, Exception):
+                self.logger.error(f"Could not resume music in guild {doc['_id']}: {result}")
+        if docs:
+            self.logger.info(f"Resumed music in {self.stats['resumed']} of {len(docs)} guilds")
+
+    async def _resume_guild(self, doc: dict):
+        guild = self.bot.get_guild(doc["_id"])
+        voice_channel = guild.get_channel(doc["voice_channel_id"]) if guild else None
+        if not isinstance(voice_channel, discord.VoiceChannel | discord.StageChannel) or not voice_channel.members:
+            # Nobody is left to listen
+            self.mark_dirty(doc["_id"])
+            return
+
+        player = self.bot.music_queue_service.get_player(guild)
+        if player.is_in_vc():
+            return
+
+        text_channel = self.bot.get_channel(doc["text_channel_id"]) if doc.get("text_channel_id") else None
+        songs = [AudioMetaData.from_dict(song) for song in ([doc["current"]] if doc.get("current") else []) + doc.get("queue", [])]
+        if not songs:
+            return
+        for song in songs:
+            song.text_channel = text_channel
+            song.to_front = False
+            song.skip_now_playing_embed = song.skip_now_playing_embed or text_channel is None
+        if doc.get("current"):
+            songs[0].position = doc.get("position", 0)
+            songs[0].should_pause = doc.get("paused", False)
+
+        # Resolve before joining, a song that no longer plays should not leave the bot sitting silent in the channel
+        try:
+            await self.bot.audio_service.refresh_stream_url(songs[0])
+        except Exception:
+            self.mark_dirty(guild.id)
+            raise
+
+        player.voice_client = await voice_channel.connect(self_deaf=True)
+        try:
+            await player.add(songs[0])
+        except Exception:
+            # leave() also clears the saved state
+            await player.leave()
+            raise
+        for song in songs[1:]:
+            player.queue.push(song)
+        self.mark_dirty(guild.id)
+        self.stats["resumed"] += 1
+        self.logger.info(f"Resumed {len(songs)} songs in guild {guild.id} at {songs[0].position}s")
@@ -121,6 +121,7 @@ class AudioMetaData:
     thumbnail_url: str | None = None
     source: AudioSource = AudioSource.YOUTUBE
     likes: int | None = None
+    codec: str | None = None
     filter_preset: FilterPreset | None = FilterPreset.NONE
     requested_by: str | None = None
     text_channel: discord.TextChannel | None = None
@@ -143,6 +144,7 @@ class AudioMetaData:
             thumbnail_url=data.get("thumbnail_url"),
             source=AudioSource(data.get("source", "youtube")),
             likes=data.get("likes"),
+            codec=data.get("codec"),
             filter_preset=filter_preset,
             requested_by=data["requested_by"],
             position=data.get("position"),
@@ -162,6 +164,7 @@ class AudioMetaData:
             "thumbnail_url": self.thumbnail_url,
             "source": self.source.value,
             "likes": self.likes,
+            "codec": self.codec,
             "filter_preset": self.filter_preset.value if self.filter_preset else None,
             "requested_by": self.requested_by,
             "position": self.position or 0,
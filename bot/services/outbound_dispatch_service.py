@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import discord
+
+from .rate_limit_service import ExpiringDict
+
+DISCORD_MESSAGE_LIMIT = 2000
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_FILES = 10
+
+
+@dataclass
+class OutboundMessage:
+    content: str | None = None
+    embeds: list[discord.Embed] = field(default_factory=list)
+    files: list[discord.File] = field(default_factory=list)
+    reference: discord.Message | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    done: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def can_merge(self, other: "OutboundMessage") -> bool:
+        """Replies keep their own call, plain sends merge while they stay within Discord's per-message limits."""
+        if self.reference or other.reference:
+            return False
+        content_length = len(self.content or "") + len(other.content or "") + 1
+        return content_length <= DISCORD_MESSAGE_LIMIT and len(self.embeds) + len(other.embeds) <= DISCORD_MAX_EMBEDS and len(self.files) + len(other.files) <= DISCORD_MAX_FILES
+
+
+class OutboundDispatchService:
+    """Queues outbound messages per channel and paces them under Discord's per-channel rate limit."""
+
+    def __init__(self, messages_per_window: int, window_seconds: float, merge_adjacent: bool, max_retries: int):
+        self.messages_per_window = messages_per_window
+        self.window_seconds = window_seconds
+        self.merge_adjacent = merge_adjacent
+        self.max_retries = max_retries
+        self.queues: dict[int, deque[OutboundMessage]] = {}
+        self.drainers: dict[int, asyncio.Task] = {}
+        # Recent send times per channel, only kept while they can still delay a send
+        self.send_history = ExpiringDict(window_seconds, 10000)
+        self.blocked_until: dict[int, float] = {}
+        self.global_blocked_until = 0.0
+        self.stats = {"messages": 0, "sent": 0, "calls": 0, "merged": 0, "rate_limited": 0, "failed": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        self.logger = logging.getLogger(__name__)
+        self.logger.info(f"Initialized OutboundDispatchService with {messages_per_window} messages per {window_seconds}s per channel (merge_adjacent={merge_adjacent})")
+
+    async def send(
+        self,
+        channel: discord.abc.Messageable,
+        content: str | None = None,
+        *,
+        embed: discord.Embed | None = None,
+        file: discord.File | None = None,
+        files: list[discord.File] | None = None,
+        reference: discord.Message | None = None,
+    ) -> discord.Message:
+        """Queue a message for the channel and wait until it has been sent."""
+        outbound = OutboundMessage(content=content, embeds=[embed] if embed else [], files=[file] if file else list(files or []), reference=reference)
+        self.queues.setdefault(channel.id, deque()).append(outbound)
+        self.stats["messages"] += 1
+
+        if channel.id not in self.drainers:
+            self.drainers[channel.id] = asyncio.create_task(self._drain(channel))
+
+        return await outbound.done
+
+    def get_metrics(self) -> dict:
+        return {
+            "queued": sum(len(queue) for queue in self.queues.values()),
+            "active_channels": len(self.drainers),
+            "messages": self.stats["messages"],
+            "sent": self.stats["sent"],
+            "calls": self.stats["calls"],
+            "merged": self.stats["merged"],
+            "rate_limited": self.stats["rate_limited"],
+            "failed": self.stats["failed"],
+            "avg_wait_seconds": self.stats["total_wait_seconds"] / self.stats["sent"] if self.stats["sent"] else 0.0,
+            "max_wait_seconds": self.stats["max_wait_seconds"],
+        }
+
+    async def stop(self):
+        for drainer in self.drainers.values():
+            drainer.cancel()
+        await asyncio.gather(*self.drainers.values(), return_exceptions=True)
+        self.drainers = {}
+
+        for queue in self.queues.values():
+            for outbound in queue:
+                if not outbound.done.done():
+                    outbound.done.set_exception(RuntimeError("Outbound dispatcher stopped before the message was sent"))
+        self.queues = {}
+
+    async def _drain(self, channel: discord.abc.Messageable):
+        queue = self.queues[channel.id]
+        try:
+            while queue:
+                await self._wait_for_capacity(channel.id)
+                batch = [queue.popleft()]
+                while self.merge_adjacent and queue and self._merged(batch).can_merge(queue[0]):
+                    batch.append(queue.popleft())
+                await self._send_batch(channel, batch, queue)
+        finally:
+            self.drainers.pop(channel.id, None)
+            if not queue:
+                self.queues.pop(channel.id, None)
+
+    async def _wait_for_capacity(self, channel_id: int):
+        while True:
+            now = time.monotonic()
+            history = self.send_history.get(channel_id, now)
+            wait = max(self.global_blocked_until, self.blocked_until.get(channel_id, 0.0)) - now
+            if history and len(history) >= self.messages_per_window:
+                wait = max(wait, history[0] + self.window_seconds - now)
+            if wait <= 0:
+                self.blocked_until.pop(channel_id, None)
+                return
+            await asyncio.sleep(wait)
+
+    async def _send_batch(self, channel: discord.abc.Messageable, batch: list[OutboundMessage], queue: deque[OutboundMessage]):
+        merged = self._merged(batch)
+        now = time.monotonic()
+        self.stats["calls"] += 1
+        history = self.send_history.get(channel.id, now) or deque(maxlen=self.messages_per_window)
+        history.append(now)
+        self.send_history.set(channel.id, history, now)
+
+        try:
+            if merged.reference:
+                sent = await merged.reference.reply(content=merged.content, embeds=merged.embeds, files=merged.files)
+            else:
+                sent = await channel.send(content=merged.content, embeds=merged.embeds, files=merged.files)
+        except discord.HTTPException as e:
+            if e.status == 429 and merged.attempts < self.max_retries:
+                # discord.py already retried internally, back off on the bucket the headers describe and try again
+                self._apply_rate_limit_headers(channel.id, e)
+                for outbound in reversed(batch):
+                    outbound.attempts += 1
+                    for file in outbound.files:
+                        file.reset()
+                    queue.appendleft(outbound)
+                return
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        self.stats["sent"] += len(batch)
+        self.stats["merged"] += len(batch) - 1
+        for outbound in batch:
+            # Queue latency runs from enqueue until the call that delivered the message started
+            waited = now - outbound.enqueued_at
+            self.stats["total_wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+            if not outbound.done.done():
+                outbound.done.set_result(sent)
+
+    def _apply_rate_limit_headers(self, channel_id: int, error: discord.HTTPException):
+        headers = getattr(error.response, "headers", None) or {}
+        retry_after = float(headers.get("X-RateLimit-Reset-After") or headers.get("Retry-After") or self.window_seconds)
+        blocked_until = time.monotonic() + retry_after
+        self.stats["rate_limited"] += 1
+
+        if headers.get("X-RateLimit-Global"):
+            self.global_blocked_until = max(self.global_blocked_until, blocked_until)
+        else:
+            self.blocked_until[channel_id] = max(self.blocked_until.get(channel_id, 0.0), blocked_until)
+        self.logger.warning(f"Rate limited sending to channel {channel_id} (bucket {headers.get('X-RateLimit-Bucket', 'unknown')}), backing off {retry_after:.2f}s")
+
+    def _fail(self, batch: list[OutboundMessage], error: Exception):
+        self.stats["failed"] += len(batch)
+        for outbound in batch:
+            if not outbound.done.done():
+                outbound.done.set_exception(error)
+
+    @staticmethod
+    def _merged(batch: list[OutboundMessage]) -> OutboundMessage:
+        if len(batch) == 1:
+            return batch[0]
+        contents = [outbound.content for outbound in batch if outbound.content]
+        return OutboundMessage(
+            content="\n".join(contents) if contents else None,
+            embeds=[embed for outbound in batch for embed in outbound.embeds],
+            files=[file for outbound in batch for file in outbound.files],
+            attempts=max(outbound.attempts for outbound in batch),
+        )
@@ -0,0 +1,138 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import discord
+
+
+class ExpiringDict:
+    """Size-capped dict whose entries expire a fixed time after their last write.
+
+    Writes move a key to the back, so with one TTL per dict the front always expires first
+    and expired entries can be swept from the front in amortized O(1).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Any, now: float) -> Any | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self.entries[key]
+            return None
+        return value
+
+    def pop(self, key: Any):
+        self.entries.pop(key, None)
+
+    def set(self, key: Any, value: Any, now: float):
+        self.entries[key] = (now + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        self._sweep(now)
+
+    def _sweep(self, now: float):
+        while self.entries:
+            key, (expires_at, _) = next(iter(self.entries.items()))
+            if expires_at > now and len(self.entries) <= self.max_entries:
+                break
+            # Evicting a live entry under memory pressure only ever forgives a limit, never blocks
+            del self.entries[key]
+
+
+@dataclass
+class RateLimitPolicy:
+    scope: Literal["user", "channel", "guild", "global"]
+    algorithm: Literal["sliding_window", "token_bucket"]
+    limit: int
+    windowSeconds: float
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RateLimitPolicy":
+        return cls(
+            scope=data.get("scope", "user"),
+            algorithm=data.get("algorithm", "sliding_window"),
+            limit=data["limit"],
+            windowSeconds=data["windowSeconds"],
+        )
+
+
+class RateLimitService:
+    """O(1) per-check rate limiting at user, channel, guild and global scope with a hard memory ceiling."""
+
+    def __init__(self, cooldown_duration: float, bypass_ids: list[int], policies: list[dict], max_entries_per_policy: int):
+        self.bypass_ids = set(bypass_ids)
+        self.logger = logging.getLogger(__name__)
+
+        # The legacy per-user cooldown is exactly a one-token bucket
+        self.policies = [RateLimitPolicy(scope="user", algorithm="token_bucket", limit=1, windowSeconds=cooldown_duration)] if cooldown_duration > 0 else []
+        self.policies.extend(RateLimitPolicy.from_dict(policy) for policy in policies)
+
+        # A token bucket is indistinguishable from fresh one window after its last use, a sliding window after two
+        self.states = [ExpiringDict(policy.windowSeconds * (1 if policy.algorithm == "token_bucket" else 2), max_entries_per_policy) for policy in self.policies]
+        self.logger.info(f"Initialized RateLimitService with {len(self.policies)} policies: {', '.join(f'{p.scope}/{p.algorithm} {p.limit} per {p.windowSeconds}s' for p in self.policies)}")
+
+    def try_acquire(self, message: discord.Message) -> bool:
+        """Check every policy for this message and consume from all of them only if all allow it."""
+        if message.author.id in self.bypass_ids:
+            return True
+
+        now = time.monotonic()
+        updates = []
+        for policy, states in zip(self.policies, self.states, strict=True):
+            key = self._get_key(policy, message)
+            allowed, new_state, retry_after = self._evaluate(policy, states.get(key, now), now)
+            if not allowed:
+                self.logger.info(f"⏰ Slow down! {message.author.name} hit the {policy.scope} limit ({policy.limit} per {policy.windowSeconds}s), retry in {int(retry_after)} seconds.")
+                return False
+            updates.append((states, key, new_state))
+
+        for states, key, new_state in updates:
+            states.set(key, new_state, now)
+        return True
+
+    def get_metrics(self) -> dict:
+        return {f"{policy.scope}/{policy.algorithm}": len(states) for policy, states in zip(self.policies, self.states, strict=True)}
+
+    @staticmethod
+    def _get_key(policy: RateLimitPolicy, message: discord.Message) -> int:
+        if policy.scope == "user":
+            return message.author.id
+        if policy.scope == "channel":
+            return message.channel.id
+        if policy.scope == "guild":
+            return message.guild.id if message.guild else 0
+        return 0
+
+    @staticmethod
+    def _evaluate(policy: RateLimitPolicy, state: tuple | None, now: float) -> tuple[bool, tuple, float]:
+        """Return (allowed, state after consuming one unit, seconds until allowed)."""
+        if policy.algorithm == "token_bucket":
+            refill_rate = policy.limit / policy.windowSeconds
+            tokens, last = state if state else (float(policy.limit), now)
+            tokens = min(float(policy.limit), tokens + (now - last) * refill_rate)
+            if tokens < 1:
+                return False, (tokens, now), (1 - tokens) / refill_rate
+            return True, (tokens - 1, now), 0.0
+
+        # Sliding window counter: weight the previous fixed window by how much of it still overlaps
+        window_start, current, previous = state if state else (now, 0, 0)
+        elapsed_windows = int((now - window_start) // policy.windowSeconds)
+        if elapsed_windows >= 1:
+            previous = current if elapsed_windows == 1 else 0
+            current = 0
+            window_start += elapsed_windows * policy.windowSeconds
+
+        overlap = 1 - (now - window_start) / policy.windowSeconds
+        if previous * overlap + current + 1 > policy.limit:
+            return False, (window_start, current, previous), window_start + policy.windowSeconds - now
+        return True, (window_start, current + 1, previous), 0.0
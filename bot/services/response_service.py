@@ -1,71 +1,130 @@
+import io
 import logging
 import re
+from collections.abc import Iterator
 
 import discord
 
+from .mention_rewriter import MentionRewriter
+from .outbound_dispatch_service import OutboundDispatchService
+
+DISCORD_MESSAGE_LIMIT = 2000
+# Room left in every chunk for closing a fence that spans the cut
+FENCE_RESERVE = 16
+LIST_ITEM_PATTERN = re.compile(r"\s*(?:[-*+]|\d+[.)])\s")
+
 
 class ResponseService:
-    def __init__(self, names_to_ats: dict):
-        self.names_to_ats = names_to_ats
+    def __init__(self, mention_rewriter: MentionRewriter, outbound_dispatch_service: OutboundDispatchService, max_response_chunks: int = 0):
+        self.mention_rewriter = mention_rewriter
+        self.outbound_dispatch_service = outbound_dispatch_service
+        self.max_response_chunks = max_response_chunks
         self.logger = logging.getLogger(__name__)
 
     def process_mentions(self, content: str) -> str:
         """Replace name mentions with Discord user IDs."""
-
-        for name in self.names_to_ats.keys():
-            # Remove backticks around the username
-            backtick_pattern = r"`\b(" + re.escape(name) + r")\b`"
-            content = re.sub(backtick_pattern, r"\1", content, flags=re.IGNORECASE)
-
-        for name, user_id in self.names_to_ats.items():
-            pattern = re.compile(r"\b" + re.escape(name) + r"\b", re.IGNORECASE)
-            content = pattern.sub(f"{user_id}", content)
-        return content
+        return self.mention_rewriter.to_mentions(content)
 
     def split_long_message(self, content: str, max_length: int = 2000) -> list[str]:
         """Split messages longer than max_length characters."""
+        chunks, _ = self._split_message(content, max_length)
+        return chunks
+
+    def _split_message(self, content: str, max_length: int, max_chunks: int = 0) -> tuple[list[str], str | None]:
+        """Split content in one pass over its lines, preferring paragraph and list boundaries.
+
+        A code fence that spans a cut is closed at the end of the chunk and re-opened at the start
+        of the next one. With max_chunks, everything after the last chunk is returned as overflow.
+        """
         if len(content) <= max_length:
-            return [content]
+            return [content], None
 
-        chunks = []
-        while len(content) > max_length:
-            chunk = content[:max_length]
-            last_space = chunk.rfind(" ")
+        budget = max_length - FENCE_RESERVE
+        chunks: list[str] = []
+        lines: list[str] = []
+        length = 0
+        prefix = 0  # re-opened fence line at the start of the current chunk
+        fence = None  # opening line of the fence open at the end of the current chunk
+        best_break = None  # (line count, length, open fence) of the nicest cut seen in this chunk
+        pieces = self._iter_line_pieces(content, budget - FENCE_RESERVE)
 
-            if last_space != -1:
-                chunks.append(content[:last_space])
-                content = content[last_space + 1 :]
-            else:
-                chunks.append(content[:max_length])
-                content = content[max_length:]
+        for line in pieces:
+            stripped = line.strip()
+            if length + len(line) + 1 > budget and len(lines) > prefix:
+                cut, cut_length, cut_fence = best_break if best_break and best_break[1] >= budget // 2 else (len(lines), length, fence)
+                chunk = "\n".join(lines[:cut])
+                chunks.append(f"{chunk}\n{self._fence_marker(cut_fence)}" if cut_fence else chunk)
 
-        if content:
-            chunks.append(content)
+                lines = ([cut_fence] if cut_fence else []) + lines[cut:]
+                length = sum(len(carried) + 1 for carried in lines)
+                prefix = 1 if cut_fence else 0
+                best_break = None
 
-        return chunks
+                if max_chunks and len(chunks) == max_chunks:
+                    return chunks, "\n".join([*lines, line, *pieces])
+
+            # Cutting before a list item or heading keeps it with the lines that follow
+            if lines and fence is None and (LIST_ITEM_PATTERN.match(line) or stripped.startswith("#")):
+                best_break = (len(lines), length, None)
+
+            lines.append(line)
+            length += len(line) + 1
+
+            if stripped.startswith(("```", "~~~")):
+                if fence is None:
+                    fence = stripped
+                elif not stripped.lstrip(fence[0]) and len(stripped) >= len(self._fence_marker(fence)):
+                    fence = None
+                    best_break = (len(lines), length, None)
+            elif not stripped:
+                best_break = (len(lines), length, fence)
+
+        if len(lines) > prefix:
+            chunks.append("\n".join(lines))
+        return chunks, None
+
+    @staticmethod
+    def _iter_line_pieces(content: str, max_length: int) -> Iterator[str]:
+        """Yield content line by line, hard-splitting lines that could never fit in a chunk at their last space."""
+        for line in content.split("\n"):
+            start = 0
+            while len(line) - start > max_length:
+                end = line.rfind(" ", start, start + max_length)
+                if end <= start:
+                    yield line[start : start + max_length]
+                    start += max_length
+                else:
+                    yield line[start:end]
+                    start = end + 1
+            yield line[start:]
+
+    @staticmethod
+    def _fence_marker(fence_line: str) -> str:
+        """Return the run of backticks or tildes that opens a fence, which is also what closes it."""
+        return fence_line[: len(fence_line) - len(fence_line.lstrip(fence_line[0]))]
 
     async def send_response(self, message: discord.Message, content: str, image_file: discord.File | None = None):
         """Send the AI response, splitting if necessary."""
         processed_content = self.process_mentions(content)
-        chunks = self.split_long_message(processed_content)
-
-        try:
-            if image_file:
-                await message.reply(content=processed_content, file=image_file)
-            else:
-                for idx, chunk in enumerate(chunks):
-                    if idx == 0:
-                        await message.reply(chunk)
-                    else:
-                        await message.channel.send("...")
-                        await message.channel.send(chunk)
-        except Exception:
-            if image_file:
-                await message.channel.send(content=processed_content, file=image_file)
-            else:
-                for idx, chunk in enumerate(chunks):
-                    if idx == 0:
-                        await message.channel.send(chunk)
-                    else:
-                        await message.channel.send("...")
-                        await message.channel.send(chunk)
+        chunks, overflow = self._split_message(processed_content, DISCORD_MESSAGE_LIMIT, self.max_response_chunks)
+
+        if overflow:
+            self.logger.info(f"Folding {len(overflow)} characters of overflow into an attachment after {len(chunks)} chunks")
+
+        for idx, chunk in enumerate(chunks):
+            files = []
+            if idx == 0 and image_file:
+                files.append(image_file)
+            if idx == len(chunks) - 1 and overflow:
+                files.append(discord.File(io.BytesIO(overflow.encode("utf-8")), filename="response.md"))
+
+            if idx == 0:
+                try:
+                    await self.outbound_dispatch_service.send(message.channel, chunk, files=files, reference=message)
+                    continue
+                except Exception:
+                    # The original message may be gone, fall back to a plain send
+                    for file in files:
+                        file.reset()
+
+            await self.outbound_dispatch_service.send(message.channel, chunk, files=files)